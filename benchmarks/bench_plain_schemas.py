@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the time and memory it takes to build the OpenAPI specification of a
+large application with the JSON schemas converted to `Schema` objects (the
+default) against keeping them as plain dicts (`plain_schemas=True`).
+
+Each mode runs in a fresh process, so the model and schema caches start empty.
+
+Usage:
+    python benchmarks/bench_plain_schemas.py [--routes 1000]
+"""
+
+import argparse
+import gc
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from flask_openapi3 import OpenAPI
+
+
+class Address(BaseModel):
+    street: str
+    city: str
+    zip_code: str = Field(pattern=r"^\d{5}$")
+    country: Literal["DE", "FR", "US"] = "US"
+
+
+class Author(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+    email: str | None = None
+    addresses: list[Address] = []
+
+
+class Chapter(BaseModel):
+    title: str
+    pages: int = Field(gt=0)
+    tags: dict[str, list[str]] = {}
+
+
+class BookQuery(BaseModel):
+    page: int = Field(1, ge=1)
+    page_size: int = Field(20, le=100)
+    author: str | None = None
+    tags: list[str] | None = None
+
+
+class BookBody(BaseModel):
+    title: str
+    isbn: str | None = Field(None, pattern=r"^\d{13}$")
+    authors: list[Author]
+    chapters: list[Chapter] = []
+    price: float | None = Field(None, ge=0)
+
+
+class BookResponse(BookBody):
+    bid: int
+
+
+def build(routes: int, plain_schemas: bool) -> OpenAPI:
+    app = OpenAPI(__name__, plain_schemas=plain_schemas)
+    for i in range(routes):
+        # Distinct models for every route, as in an application with many resources
+        query_model = type(f"BookQuery{i}", (BookQuery,), {})
+        body_model = type(f"BookBody{i}", (BookBody,), {})
+        response_model = type(f"BookResponse{i}", (BookResponse,), {})
+
+        def create_book(query, body):
+            return "ok"  # pragma: no cover
+
+        create_book.__annotations__ = {"query": query_model, "body": body_model}
+        app.post(f"/book{i}", responses={200: response_model}, endpoint=f"create_book{i}")(create_book)
+    app.api_doc
+    return app
+
+
+def measure(routes: int, plain_schemas: bool) -> dict:
+    start = time.perf_counter()
+    build(routes, plain_schemas)
+    elapsed = time.perf_counter() - start
+
+    # Build again with new models to trace the memory, tracing slows everything down
+    gc.collect()
+    tracemalloc.start()
+    app = build(routes, plain_schemas)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del app
+    return {"seconds": elapsed, "retained_mb": current / 2**20, "peak_mb": peak / 2**20}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", "-n", type=int, default=1000, help="Routes in the application.")
+    parser.add_argument("--plain", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.routes, args.plain)))
+        return
+
+    print(f"{'mode':<15} {'time':>10} {'retained':>12} {'peak':>12}")
+    for plain in (False, True):
+        command = [sys.executable, __file__, "--child", "--routes", str(args.routes)] + ["--plain"] * plain
+        result = json.loads(subprocess.check_output(command))
+        mode = "plain_schemas" if plain else "Schema"
+        print(f"{mode:<15} {result['seconds']:>9.2f}s {result['retained_mb']:>9.1f} MB {result['peak_mb']:>9.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Compare request validation with a precompiled request plan against compiling
+the plan (i.e. building the model JSON schemas) on every request.
+
+Usage:
+    python benchmarks/bench_request_plan.py [--number 20000]
+"""
+
+import argparse
+import timeit
+
+from pydantic import BaseModel, Field
+
+from flask_openapi3 import OpenAPI
+from flask_openapi3.request import RequestPlan, _validate_request
+
+
+class BookQuery(BaseModel):
+    age: list[int]
+    author: str | None = None
+    page: int = 1
+    page_size: int = Field(20, alias="pageSize")
+    tags: list[str] | None = None
+
+
+class BookHeader(BaseModel):
+    api_key: str
+    x_request_id: str | None = Field(None, alias="X-Request-Id")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", "-n", type=int, default=20000, help="Requests per measurement.")
+    args = parser.parse_args()
+
+    app = OpenAPI(__name__)
+    plan = RequestPlan(header=BookHeader, query=BookQuery)
+    environ = {
+        "path": "/book",
+        "query_string": "age=1&age=2&author=joy&pageSize=50&tags=a&tags=b",
+        "headers": {"Api-Key": "secret", "X-Request-Id": "abc"},
+    }
+
+    with app.test_request_context(**environ):
+        per_request = timeit.timeit(
+            lambda: _validate_request(header=BookHeader, query=BookQuery),
+            number=args.number,
+        )
+        precompiled = timeit.timeit(lambda: _validate_request(request_plan=plan), number=args.number)
+
+    print(f"per-request introspection: {per_request / args.number * 1e6:8.2f} us/request")
+    print(f"precompiled request plan:  {precompiled / args.number * 1e6:8.2f} us/request")
+    print(f"speedup:                   {per_request / precompiled:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
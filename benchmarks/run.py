@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the request/response hot path and the OpenAPI spec generation.
+
+Every case drives a real application through `app.test_client()`, so the numbers
+include routing, request validation, the view function and response encoding.
+
+Usage:
+    python benchmarks/run.py                          # run all cases
+    python benchmarks/run.py -k json -k multipart     # only cases whose name contains a keyword
+    python benchmarks/run.py --json result.json       # save machine-readable results
+    python benchmarks/run.py --compare base.json      # compare against previously saved results
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+from concurrent.futures import Executor, ThreadPoolExecutor
+from importlib.metadata import version
+from io import BytesIO
+from typing import Callable
+
+from pydantic import BaseModel, Field
+
+from flask_openapi3 import APIView, FileStorage, OpenAPI
+
+BENCHMARKS: dict[str, tuple[Callable[[], Callable[[], object]], int]] = {}
+
+
+def benchmark(name: str, scale: int = 1):
+    """Register a case factory, `scale` divides the number of iterations for slow cases."""
+
+    def decorator(factory):
+        BENCHMARKS[name] = (factory, scale)
+        return factory
+
+    return decorator
+
+
+class BookQuery(BaseModel):
+    age: list[int]
+    author: str | None = None
+    page: int = 1
+    page_size: int = Field(20, alias="pageSize")
+
+
+class BookItem(BaseModel):
+    name: str
+    price: float
+    tags: list[str] = []
+
+
+class BookBody(BaseModel):
+    title: str
+    items: list[BookItem]
+
+
+class BookForm(BaseModel):
+    file: FileStorage
+    files: list[FileStorage]
+    name: str
+    tags: list[str]
+
+
+class BookHeader(BaseModel):
+    api_key: str
+    x_request_id: str | None = Field(None, alias="X-Request-Id")
+
+
+class BookCookie(BaseModel):
+    token: str
+    lang: str = "en"
+
+
+class BookPath(BaseModel):
+    bid: int
+
+
+class BookResponse(BaseModel):
+    bid: int
+    title: str
+    tags: list[str]
+
+
+def make_client(app: OpenAPI):
+    app.config["TESTING"] = True
+    return app.test_client()
+
+
+def make_body(size: int) -> dict:
+    return {"title": "book", "items": [{"name": f"item{i}", "price": i + 0.5, "tags": ["a", "b"]} for i in range(size)]}
+
+
+@benchmark("get_query")
+def get_query():
+    app = OpenAPI(__name__)
+
+    @app.get("/book")
+    def get_book(query: BookQuery):
+        return {"age": query.age}
+
+    client = make_client(app)
+    return lambda: client.get("/book?age=1&age=2&author=joy&pageSize=50")
+
+
+def post_json(size: int):
+    app = OpenAPI(__name__)
+
+    @app.post("/book")
+    def create_book(body: BookBody):
+        return {"count": len(body.items)}
+
+    client = make_client(app)
+    data = json.dumps(make_body(size))
+    return lambda: client.post("/book", data=data, content_type="application/json")
+
+
+for _size, _scale in ((1, 1), (100, 5), (1000, 50)):
+    benchmark(f"post_json_{_size}", _scale)(lambda size=_size: post_json(size))
+
+
+@benchmark("post_multipart", 2)
+def post_multipart():
+    app = OpenAPI(__name__)
+
+    @app.post("/book")
+    def create_book(form: BookForm):
+        return {"name": form.name}
+
+    client = make_client(app)
+    content = b"x" * 4096
+
+    def request():
+        data = {
+            "file": (BytesIO(content), "a.txt"),
+            "files": [(BytesIO(content), "b.txt"), (BytesIO(content), "c.txt")],
+            "name": "book",
+            "tags": ["a", "b", "c"],
+        }
+        return client.post("/book", data=data, content_type="multipart/form-data")
+
+    return request
+
+
+@benchmark("header_cookie")
+def header_cookie():
+    app = OpenAPI(__name__)
+
+    @app.get("/book")
+    def get_book(header: BookHeader, cookie: BookCookie):
+        return {"token": cookie.token}
+
+    client = make_client(app)
+    client.set_cookie("token", "abc")
+    headers = {"Api-Key": "secret", "X-Request-Id": "1"}
+    return lambda: client.get("/book", headers=headers)
+
+
+@benchmark("api_view")
+def api_view():
+    app = OpenAPI(__name__)
+    view = APIView(url_prefix="/api")
+
+    @view.route("/book/<int:bid>")
+    class BookAPIView:
+        @view.doc(summary="get book")
+        def get(self, path: BookPath, query: BookQuery):
+            return {"bid": path.bid}
+
+    app.register_api_view(view)
+    client = make_client(app)
+    return lambda: client.get("/api/book/1?age=1")
+
+
+@benchmark("validate_response")
+def validate_response():
+    app = OpenAPI(__name__, validate_response=True)
+
+    @app.get("/book/<int:bid>", responses={200: BookResponse})
+    def get_book(path: BookPath):
+        return {"bid": path.bid, "title": "book", "tags": ["a", "b"]}
+
+    client = make_client(app)
+    return lambda: client.get("/book/1")
+
+
+def spec_generation(routes: int, lazy_spec: bool = False, spec_executor: Executor | None = None):
+    def build():
+        app = OpenAPI(__name__, lazy_spec=lazy_spec, spec_executor=spec_executor)
+        for i in range(routes):
+            path_model = type(f"BookPath{i}", (BookPath,), {})
+            body_model = type(f"BookBody{i}", (BookBody,), {})
+            response_model = type(f"BookResponse{i}", (BookResponse,), {})
+
+            def create_book(path, body):
+                return "ok"  # pragma: no cover
+
+            create_book.__annotations__ = {"path": path_model, "body": body_model}
+            app.post(f"/book{i}/<int:bid>", responses={200: response_model}, endpoint=f"create_book{i}")(create_book)
+        return app.api_doc
+
+    return build
+
+
+for _routes, _scale in ((10, 20), (100, 200), (1000, 2000)):
+    benchmark(f"spec_{_routes}_routes", _scale)(lambda routes=_routes: spec_generation(routes))
+
+_spec_executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+benchmark("spec_1000_routes_lazy", 2000)(lambda: spec_generation(1000, lazy_spec=True))
+benchmark("spec_1000_routes_lazy_threads", 2000)(lambda: spec_generation(1000, True, _spec_executor))
+
+
+def run_benchmarks(names: list[str], number: int, repeat: int) -> dict:
+    results = {}
+    for name in names:
+        factory, scale = BENCHMARKS[name]
+        func = factory()
+        loops = max(number // scale, 1)
+        # Warm up caches so only the steady state is measured
+        func()
+        timings = timeit.repeat(func, number=loops, repeat=repeat)
+        per_call = [t / loops * 1e6 for t in timings]
+        results[name] = {
+            "loops": loops,
+            "repeat": repeat,
+            "min_us": min(per_call),
+            "median_us": statistics.median(per_call),
+        }
+        print(f"{name:<22} {results[name]['min_us']:>12.2f} us  (median {results[name]['median_us']:.2f} us)")
+    return results
+
+
+def compare(results: dict, baseline: dict) -> None:
+    print(f"\n{'benchmark':<22} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        change = result["min_us"] / base["min_us"] - 1
+        print(f"{name:<22} {base['min_us']:>9.2f} us {result['min_us']:>9.2f} us {change:>+8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="keywords", action="append", default=[], help="Only run matching cases.")
+    parser.add_argument("--number", "-n", type=int, default=2000, help="Iterations per measurement.")
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="Measurements per case.")
+    parser.add_argument("--json", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="Compare against results saved with --json.")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if not args.keywords or any(k in name for k in args.keywords)]
+    results = run_benchmarks(names, args.number, args.repeat)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)["benchmarks"])
+
+    if args.json:
+        output = {
+            "machine": {"python": sys.version.split()[0], "platform": platform.platform()},
+            "versions": {name: version(name) for name in ("flask-openapi3", "flask", "werkzeug", "pydantic")},
+            "benchmarks": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(output, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,11 @@
 # @Author  : llc
 # @Time    : 2022/4/1 16:54
 import inspect
-from typing import Any, Callable
+from functools import partial
+from typing import Any, Callable, Type
 
 from flask import Blueprint
+from pydantic import BaseModel
 
 from .models import ExternalDocumentation, Server, Tag
 from .scaffold import APIScaffold
@@ -14,11 +16,14 @@ from .utils import (
     convert_responses_key_to_string,
     get_operation,
     get_operation_id_for_path,
+    get_response_models,
     get_responses,
+    merge_components_schemas,
     parse_and_store_tags,
     parse_method,
     parse_parameters,
     parse_rule,
+    rename_schema_refs,
 )
 
 
@@ -33,7 +38,9 @@ class APIBlueprint(APIScaffold, Blueprint):
         abp_responses: ResponseDict | None = None,
         doc_ui: bool = True,
         operation_id_callback: Callable = get_operation_id_for_path,
-        validate_response: bool | None = None,
+        validate_response: bool | float | None = None,
+        lazy_spec: bool = False,
+        plain_schemas: bool = False,
         **kwargs: Any,
     ) -> None:
         """
@@ -50,7 +57,11 @@ class APIBlueprint(APIScaffold, Blueprint):
             operation_id_callback: Callback function for custom operation_id generation.
                                    Receives name (str), path (str) and method (str) parameters.
                                    Defaults to `get_operation_id_for_path` from utils
-            validate_response: Verify the response body.
+            validate_response: Verify the response body, or only a sampled fraction of them if it is a float.
+            lazy_spec: Only record the routes when they are declared, and build their OpenAPI operations and schemas
+                       when the specification is first accessed. Defaults to False.
+            plain_schemas: Keep the JSON schemas generated by pydantic as plain dicts in the specification.
+                           Defaults to False.
             **kwargs: Flask Blueprint kwargs
         """
         super(APIBlueprint, self).__init__(name, import_name, **kwargs)
@@ -76,6 +87,14 @@ class APIBlueprint(APIScaffold, Blueprint):
         # Verify the response body
         self.validate_response = validate_response
 
+        # Defer collecting the OpenAPI info until the specification is accessed
+        self.lazy_spec = lazy_spec
+        self._lazy_spec_collectors: list[Callable] = []
+        self._lazy_spec_models: list[Type[BaseModel]] = []
+
+        # Keep the JSON schemas of the models as plain dicts
+        self.plain_schemas = plain_schemas
+
     def register_api(self, api: "APIBlueprint") -> None:
         """Register a nested APIBlueprint"""
 
@@ -83,23 +102,33 @@ class APIBlueprint(APIScaffold, Blueprint):
         if api is self:
             raise ValueError("Cannot register a api blueprint on itself")
 
+        if self.lazy_spec:
+            self._lazy_spec_collectors.append(partial(self._merge_api_spec, api))
+            self._lazy_spec_models.extend(api._lazy_spec_models)
+        else:
+            self._merge_api_spec(api)
+
+        # Register the nested APIBlueprint as a blueprint
+        self.register_blueprint(api)
+
+    def _merge_api_spec(self, api: "APIBlueprint") -> None:
+        # Collect the OpenAPI info recorded in lazy_spec mode
+        api._load_lazy_spec()
+
         # Merge tags from the nested APIBlueprint
         for tag in api.tags:
             if tag.name not in self.tag_names:
                 self.tags.append(tag)
 
+        # Merge component schemas from the nested APIBlueprint
+        renames = merge_components_schemas(self.components_schemas, api.components_schemas, self.plain_schemas)
+
         # Merge paths from the nested APIBlueprint
         for path_url, path_item in api.paths.items():
             # Parse rule: merge url_prefix and format rule from /pet/<petId> to /pet/{petId}
             uri = parse_rule(path_url, url_prefix=self.url_prefix)
 
-            self.paths[uri] = path_item
-
-        # Merge component schemas from the nested APIBlueprint
-        self.components_schemas.update(api.components_schemas)
-
-        # Register the nested APIBlueprint as a blueprint
-        self.register_blueprint(api)
+            self.paths[uri] = rename_schema_refs(path_item, renames)
 
     def _add_url_rule(
         self,
@@ -147,7 +176,30 @@ class APIBlueprint(APIScaffold, Blueprint):
             openapi_extensions: Allows extensions to the OpenAPI Schema.
             doc_ui: Declares this operation to be shown. Default to True.
         """
-        if self.doc_ui is True and doc_ui is True:
+        if self.doc_ui is True and doc_ui is True and self.lazy_spec:
+            # Only record the route, it is collected the first time the specification is accessed
+            self._lazy_spec_collectors.append(
+                partial(
+                    self._collect_openapi_info,
+                    rule,
+                    func,
+                    tags=tags,
+                    summary=summary,
+                    description=description,
+                    external_docs=external_docs,
+                    operation_id=operation_id,
+                    responses=responses,
+                    deprecated=deprecated,
+                    security=security,
+                    servers=servers,
+                    openapi_extensions=openapi_extensions,
+                    method=method,
+                )
+            )
+            combine_responses = {**self.abp_responses, **convert_responses_key_to_string(responses or {})}
+            self._lazy_spec_models.extend(get_response_models(combine_responses))
+            return parse_parameters(func, doc_ui=False)
+        elif self.doc_ui is True and doc_ui is True:
             # Convert key to string
             new_responses = convert_responses_key_to_string(responses or {})
 
@@ -187,7 +239,7 @@ class APIBlueprint(APIScaffold, Blueprint):
             parse_and_store_tags(tags, self.tags, self.tag_names, operation)
 
             # Parse response
-            get_responses(combine_responses, self.components_schemas, operation)
+            get_responses(combine_responses, self.components_schemas, operation, self.plain_schemas)
 
             # Parse rule: merge url_prefix and format rule from /pet/<petId> to /pet/{petId}
             uri = parse_rule(rule, url_prefix=self.url_prefix)
@@ -196,6 +248,8 @@ class APIBlueprint(APIScaffold, Blueprint):
             parse_method(uri, method, self.paths, operation)
 
             # Parse parameters
-            return parse_parameters(func, components_schemas=self.components_schemas, operation=operation)
+            return parse_parameters(
+                func, components_schemas=self.components_schemas, operation=operation, plain_schemas=self.plain_schemas
+            )
         else:
             return parse_parameters(func, doc_ui=False)
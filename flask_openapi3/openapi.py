@@ -1,15 +1,27 @@
 # -*- coding: utf-8 -*-
 # @Author  : llc
 # @Time    : 2021/4/30 14:25
+import gzip
+import hashlib
+import json
+import mmap
 import os
 import re
+import sys
+import threading
+from concurrent.futures import Executor
+from functools import partial
 from importlib import import_module
 from importlib.metadata import entry_points
-from typing import Any, Callable, Type
+from typing import Any, Callable, Iterable, Type, cast
 
-from flask import Blueprint, Flask, render_template_string
+from flask import Blueprint, Flask, render_template_string, request
+from flask.wrappers import Response as FlaskResponse
+from pydantic import VERSION as PYDANTIC_VERSION
 from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
 
+from .__version__ import __version__
 from .blueprint import APIBlueprint
 from .commands import openapi_command
 from .models import (
@@ -18,7 +30,7 @@ from .models import (
     Components,
     ExternalDocumentation,
     Info,
-    Schema,
+    PathItem,
     Server,
     Tag,
     ValidationErrorModel,
@@ -28,21 +40,81 @@ from .templates import openapi_html_string
 from .types import ParametersTuple, ResponseDict, SecuritySchemesDict
 from .utils import (
     HTTP_STATUS,
+    SPEC_CHUNKSIZE,
     HTTPMethod,
+    _without_defs,
     convert_responses_key_to_string,
     get_model_schema,
     get_operation,
     get_operation_id_for_path,
+    get_response_models,
     get_responses,
+    intern_schema,
+    log_response_validation_error,
+    logger,
     make_validation_error_response,
+    merge_components_schemas,
     parse_and_store_tags,
     parse_method,
     parse_parameters,
+    prefetch_model_schemas,
+    rename_schema_refs,
     run_validate_response,
 )
 from .view import APIView
 
 
+def _load_spec_compressors() -> dict[str, Callable[[bytes], bytes]]:
+    """Content encodings available for the OpenAPI document, in order of preference."""
+    compressors: dict[str, Callable[[bytes], bytes]] = {}
+
+    try:
+        import brotli  # type: ignore
+
+        compressors["br"] = brotli.compress
+    except ImportError:
+        pass
+
+    try:
+        from compression import zstd  # type: ignore
+
+        compressors["zstd"] = zstd.compress
+    except ImportError:
+        try:
+            import zstandard  # type: ignore
+
+            compressors["zstd"] = zstandard.ZstdCompressor().compress
+        except ImportError:
+            pass
+
+    compressors["gzip"] = lambda data: gzip.compress(data, mtime=0)
+
+    return compressors
+
+
+SPEC_COMPRESSORS = _load_spec_compressors()
+
+
+def _dump_spec_object(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json", by_alias=True, exclude_unset=True, warnings=False)
+    # Plain schemas are shared with the cache of the model schemas, copy them
+    return to_jsonable_python(obj)
+
+
+def _iter_model_classes() -> Iterable[type[BaseModel]]:
+    """All the pydantic models defined so far."""
+    seen: set[type] = set()
+    stack = [BaseModel]
+    while stack:
+        cls = stack.pop()
+        for subclass in cls.__subclasses__():
+            if subclass not in seen:
+                seen.add(subclass)
+                stack.append(subclass)
+                yield subclass
+
+
 class OpenAPI(APIScaffold, Flask):
     def __init__(
         self,
@@ -58,11 +130,22 @@ class OpenAPI(APIScaffold, Flask):
         validation_error_status: str | int = 422,
         validation_error_model: Type[BaseModel] = ValidationErrorModel,
         validation_error_callback: Callable = make_validation_error_response,
+        fail_fast_validation: bool = False,
         doc_ui: bool = True,
         doc_prefix: str = "/openapi",
         doc_url: str = "/openapi.json",
-        validate_response: bool | None = None,
+        validate_response: bool | float | None = None,
         validate_response_callback: Callable = run_validate_response,
+        validate_response_mode: str = "raise",
+        response_validation_error_callback: Callable = log_response_validation_error,
+        lazy_spec: bool = False,
+        server_timing: bool = False,
+        async_validation_threshold: int | None = None,
+        async_validation_executor: Executor | None = None,
+        spec_cache: str | os.PathLike | None = None,
+        frozen_spec: str | os.PathLike | None = None,
+        spec_executor: Executor | None = None,
+        plain_schemas: bool = False,
         **kwargs: Any,
     ) -> None:
         """
@@ -89,14 +172,43 @@ class OpenAPI(APIScaffold, Flask):
             validation_error_model: Validation error response model for OpenAPI Specification.
             validation_error_callback: Validation error response callback, the return format corresponds to
                 the validation_error_model.
+            fail_fast_validation: Validate the parts of a request cheapest first: path, header, cookie, query, and
+                then form or body, so that an invalid request is rejected before its body is read. Defaults to False,
+                which validates them in the order header, cookie, path, query, form and body.
             doc_ui: Enable OpenAPI document UI (Swagger UI and Redoc).
                 Defaults to True.
             doc_prefix: URL prefix used for OpenAPI document and UI.
                 Defaults to "/openapi".
             doc_url: URL for accessing the OpenAPI specification document in JSON format.
                 Defaults to "/openapi.json".
-            validate_response: Verify the response body.
+            validate_response: Verify the response body, or only a sampled fraction of them if it is a float.
             validate_response_callback: Validation and return response.
+            validate_response_mode: How response validation errors are handled. "raise" fails the request, "log" passes
+                them to `response_validation_error_callback`, and "background" does the same after the response
+                has been sent. Defaults to "raise".
+            response_validation_error_callback: Receives the `ValidationError` and the endpoint of the response in the
+                "log" and "background" modes. Defaults to logging a warning.
+            lazy_spec: Only record the routes when they are declared, and build their OpenAPI operations and schemas
+                the first time the specification is accessed. Defaults to False.
+            server_timing: Add a `Server-Timing` header with the time spent validating the request, in the view function
+                and validating the response. Defaults to False.
+            async_validation_threshold: Requests to async view functions with a body of at least this many bytes are
+                read and validated in `async_validation_executor`, so that they don't block the event loop.
+                Defaults to None, which always validates inline.
+            async_validation_executor: The executor used above `async_validation_threshold`.
+                Defaults to None, the default executor of the event loop.
+            spec_cache: A file to store the generated specification JSON in, so that other processes of the
+                application can load it instead of generating it again. It is only used while the routes, the models
+                and the API information are unchanged. Defaults to None.
+            frozen_spec: Serve this pre-generated specification JSON file, e.g. exported with `flask openapi`,
+                instead of generating it. The OpenAPI operations and schemas of the routes are not built, only the
+                models for the request validation. Relative paths are relative to the application's root path.
+                Defaults to None.
+            spec_executor: Generate the schemas of the models recorded in `lazy_spec` mode, and convert the
+                specification to JSON, concurrently in this executor. With a process pool, the models must be
+                importable by the worker processes. Defaults to None, which generates everything sequentially.
+            plain_schemas: Keep the JSON schemas generated by pydantic as plain dicts in the specification, instead of
+                converting them to `Schema` objects and back. Defaults to False.
             **kwargs: Additional kwargs to be passed to Flask.
         """
         super(OpenAPI, self).__init__(import_name, **kwargs)
@@ -120,6 +232,15 @@ class OpenAPI(APIScaffold, Flask):
         self.tags: list[Tag] = []
         self.tag_names: list[str] = []
 
+        # Defer collecting the OpenAPI info until the specification is accessed
+        self.lazy_spec = lazy_spec
+        self._lazy_spec_collectors: list[Callable] = []
+        self._lazy_spec_models: list[Type[BaseModel]] = []
+        self.spec_executor = spec_executor
+
+        # Keep the JSON schemas of the models as plain dicts
+        self.plain_schemas = plain_schemas
+
         # Set URL prefixes and endpoints
         self.doc_prefix = doc_prefix
         self.doc_url = doc_url
@@ -139,6 +260,9 @@ class OpenAPI(APIScaffold, Flask):
         self.validation_error_model = validation_error_model
         self.validation_error_callback = validation_error_callback
 
+        # Validate the cheapest parts of a request first
+        self.fail_fast_validation = fail_fast_validation
+
         # Initialize the OpenAPI documentation UI
         if doc_ui:
             self._init_doc()
@@ -149,11 +273,46 @@ class OpenAPI(APIScaffold, Flask):
         # Verify the response body
         self.validate_response = validate_response
         self.validate_response_callback = validate_response_callback
+        if validate_response_mode not in ("raise", "log", "background"):
+            raise ValueError(f"invalid validate_response_mode: {validate_response_mode!r}")
+        self.validate_response_mode = validate_response_mode
+        self.response_validation_error_callback = response_validation_error_callback
+
+        # Add the time spent in each phase of a request to the response headers
+        self.server_timing = server_timing
+
+        # Validate large requests to async view functions off the event loop
+        self.async_validation_threshold = async_validation_threshold
+        self.async_validation_executor = async_validation_executor
 
         # Initialize specification JSON
         self.spec_json: dict = {}
+
+        # Load the specification JSON from this file when it was generated from the same code
+        self.spec_cache = spec_cache
+        self._spec_from_cache = False
+        self._cached_lazy_spec_collectors: list[Callable] = []
+
+        # Encoded specification JSON, keyed by content encoding
+        self.spec_bytes: dict[str, bytes] = {}
+        self.spec_etag: str = ""
+        self._spec_bytes_source: dict | None = None
+
+        # Converted paths and component schemas, and the ones changed since they were converted
+        self._paths_json: dict[str, dict] = {}
+        self._schemas_json: dict[str, Any] = {}
+        self._dirty_paths: set[str] = set()
+        self._dirty_schemas: set[str] = set()
+        self._spec_stale = True
+        # Generating the document changes the parts above, requests are served by several threads
+        self._spec_lock = threading.RLock()
         self.spec = APISpec(openapi=self.openapi_version, info=self.info, paths=self.paths)
 
+        # Serve a pre-generated specification JSON instead of generating it
+        self.frozen_spec = frozen_spec
+        if frozen_spec is not None:
+            self._load_frozen_spec()
+
     def _init_doc(self) -> None:
         """
         Provide Swagger UI, Redoc, and Rapidoc
@@ -172,7 +331,7 @@ class OpenAPI(APIScaffold, Flask):
         )
 
         # Add the API documentation URL rule
-        blueprint.add_url_rule(rule=self.doc_url, endpoint="doc_url", view_func=lambda: self.api_doc)
+        blueprint.add_url_rule(rule=self.doc_url, endpoint="doc_url", view_func=self.make_doc_response)
 
         ui_templates = []
         # Iterate over all entry points in the "flask_openapi3.plugins" group
@@ -215,14 +374,184 @@ class OpenAPI(APIScaffold, Flask):
             The OpenAPI specification JSON as a dictionary.
 
         """
-        if self.spec_json:
+        if self.frozen_spec is not None:
             return self.spec_json
 
-        self.generate_spec_json()
+        with self._spec_lock:
+            if self.spec_json and not (
+                self._spec_stale or self._dirty_paths or self._dirty_schemas or self._lazy_spec_collectors
+            ):
+                return self.spec_json
+
+            if self.spec_cache is None:
+                self.generate_spec_json()
+                return self.spec_json
+
+            fingerprint = self._spec_fingerprint()
+            if self.spec_json or not self._read_spec_cache(fingerprint):
+                self.generate_spec_json()
+                self._write_spec_cache(fingerprint)
+
+            return self.spec_json
+
+    def _load_frozen_spec(self) -> None:
+        with open(os.path.join(self.root_path, self.frozen_spec), "rb") as f:  # type: ignore[arg-type]
+            data = f.read()
+        self.spec_json = json.loads(data)
+        self._set_spec_bytes(data)
+
+    def _spec_fingerprint(self) -> str:
+        """
+        Hash everything the specification JSON is generated from: the API information, the URL rules,
+        and the source code of the view functions and the models.
+        """
+        digest = hashlib.sha256()
+        head = (
+            __version__,
+            PYDANTIC_VERSION,
+            self.openapi_version,
+            self.info,
+            self.severs,
+            self.external_docs,
+            self.security_schemes,
+            self.openapi_extensions,
+            self.responses,
+            self.tags,
+            self.validation_error_status,
+            self.validation_error_model,
+        )
+        digest.update(repr(head).encode())
+
+        rules = sorted((rule.rule, rule.endpoint, sorted(rule.methods or ())) for rule in self.url_map.iter_rules())
+        digest.update(repr(rules).encode())
+
+        modules = {getattr(func, "__module__", None) for func in self.view_functions.values()}
+        modules.add(getattr(self.operation_id_callback, "__module__", None))
+        modules.update(model.__module__ for model in _iter_model_classes())
+        for name in sorted(filter(None, modules)):
+            digest.update(name.encode())
+            filename = getattr(sys.modules.get(name), "__file__", None)
+            if filename:
+                try:
+                    with open(filename, "rb") as f:
+                        digest.update(hashlib.sha256(f.read()).digest())
+                except OSError:  # pragma: no cover
+                    pass
+
+        return digest.hexdigest()
+
+    def _read_spec_cache(self, fingerprint: str) -> bool:
+        header = f"{fingerprint}\n".encode()
+        try:
+            with open(self.spec_cache, "rb") as f:  # type: ignore[arg-type]
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if mm[: len(header)] != header:
+                        return False
+                    data = mm[len(header) :]
+            spec_json = json.loads(data)
+        except (OSError, ValueError):
+            return False
+
+        self.spec_json = spec_json
+        self._set_spec_bytes(data)
+        self._spec_stale = False
+        self._dirty_paths = set()
+        self._dirty_schemas = set()
+
+        # The OpenAPI info recorded in lazy_spec mode is only collected if the document is generated again
+        self._spec_from_cache = True
+        self._cached_lazy_spec_collectors, self._lazy_spec_collectors = self._lazy_spec_collectors, []
+
+        return True
+
+    def _write_spec_cache(self, fingerprint: str) -> None:
+        self._set_spec_bytes(self._encode_spec_json())
+        tmp_path = f"{os.fspath(self.spec_cache)}.{os.getpid()}.tmp"  # type: ignore[arg-type]
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(f"{fingerprint}\n".encode())
+                f.write(self.spec_bytes["identity"])
+            # Replace the file atomically, other processes may be reading it
+            os.replace(tmp_path, self.spec_cache)  # type: ignore[arg-type]
+        except OSError as e:
+            logger.warning("Failed to write the OpenAPI spec cache %s: %s", self.spec_cache, e)
+
+    def invalidate_spec(self, paths: Iterable[str] | None = None) -> None:
+        """
+        Invalidate the generated OpenAPI specification JSON.
+
+        Routes and blueprints registered after the specification has been generated are picked up
+        automatically. Call this method after changing the specification by other means.
+
+        Args:
+            paths: Only regenerate these paths, e.g. `/book/{bid}`. Defaults to the whole document.
+        """
+        with self._spec_lock:
+            if paths is None:
+                self._spec_stale = True
+            else:
+                self._dirty_paths.update(paths)
+
+    def make_doc_response(self) -> FlaskResponse:
+        """
+        Serve the OpenAPI specification JSON from cached, pre-encoded bytes.
+
+        The document is encoded once, and compressed once per content encoding accepted by the clients.
+        Requests with a matching `If-None-Match` header get a 304 response.
+        """
+        encoding = request.accept_encodings.best_match(list(SPEC_COMPRESSORS)) or "identity"
+        with self._spec_lock:
+            spec_json = self.api_doc
+
+            if self._spec_bytes_source is not spec_json:
+                self._set_spec_bytes(self._encode_spec_json())
+
+            data = self.spec_bytes.get(encoding)
+            if data is None:
+                data = self.spec_bytes[encoding] = SPEC_COMPRESSORS[encoding](self.spec_bytes["identity"])
+
+            etag = self.spec_etag if encoding == "identity" else f"{self.spec_etag}-{encoding}"
+
+        if request.if_none_match.contains(etag):
+            response = self.response_class(status=304)
+        else:
+            response = self.response_class(data, mimetype="application/json")
+            if encoding != "identity":
+                response.headers["Content-Encoding"] = encoding
+
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = self.config.get("OPENAPI_DOC_CACHE_CONTROL") or "no-cache"
+        response.vary.add("Accept-Encoding")
+
+        return response
 
-        return self.spec_json
+    def _encode_spec_json(self) -> bytes:
+        # Encode with the JSON provider, as jsonify would
+        response = cast(FlaskResponse, self.json.response(self.spec_json))
+        return response.get_data()
+
+    def _set_spec_bytes(self, data: bytes) -> None:
+        self.spec_bytes = {"identity": data}
+        self.spec_etag = hashlib.sha256(data).hexdigest()[:32]
+        self._spec_bytes_source = self.spec_json
 
     def generate_spec_json(self):
+        if self._spec_from_cache:
+            # Nothing was converted when the document was loaded from the spec cache
+            self._spec_from_cache = False
+            self._spec_stale = True
+            self._lazy_spec_collectors = self._cached_lazy_spec_collectors + self._lazy_spec_collectors
+            self._cached_lazy_spec_collectors = []
+
+        if self.spec_executor is not None and self._lazy_spec_collectors:
+            # Generate the response schemas of the recorded routes up front, the collectors then find them cached
+            models = [*get_response_models(self.responses), *self._lazy_spec_models]
+            prefetch_model_schemas(models, self.spec_executor, mode="serialization")
+        self._lazy_spec_models = []
+
+        # Collect the OpenAPI info recorded in lazy_spec mode
+        self._load_lazy_spec()
+
         self.spec.openapi = self.openapi_version
         self.spec.info = self.info
         self.spec.paths = self.paths
@@ -237,44 +566,99 @@ class OpenAPI(APIScaffold, Flask):
         if self.tags:
             self.spec.tags = self.tags
 
-        # Add ValidationErrorModel to components schemas
-        schema = get_model_schema(self.validation_error_model)
-        self.components_schemas[self.validation_error_model.__name__] = Schema(**schema)
-
-        # Parse definitions
-        definitions = schema.get("$defs", {})
-        for name, value in definitions.items():
-            self.components_schemas[name] = Schema(**value)
+        if self._spec_stale or not self.spec_json:
+            # Add ValidationErrorModel to components schemas
+            schema = get_model_schema(self.validation_error_model)
+            self.components_schemas[self.validation_error_model.__name__] = intern_schema(
+                _without_defs(schema) if self.plain_schemas else schema, self.plain_schemas
+            )[0]
+
+            # Parse definitions
+            definitions = schema.get("$defs", {})
+            for name, value in definitions.items():
+                self.components_schemas[name] = intern_schema(value, self.plain_schemas)[0]
+
+            # Regenerate the whole document
+            self._paths_json.clear()
+            self._schemas_json.clear()
+            dirty_paths: Iterable[str] = self.paths.keys()
+            dirty_schemas: Iterable[str] = self.components_schemas.keys()
+        else:
+            # Only regenerate what changed since the last generation
+            dirty_paths = self._dirty_paths
+            dirty_schemas = self._dirty_schemas
+
+        dirty_paths = [uri for uri in dirty_paths if uri in self.paths]
+        dirty_schemas = [name for name in dirty_schemas if name in self.components_schemas]
+        if self.spec_executor is None:
+            for uri in dirty_paths:
+                self._paths_json[uri] = self._dump_path_item(self.paths[uri])
+            for name in dirty_schemas:
+                self._schemas_json[name] = _dump_spec_object(self.components_schemas[name])
+        else:
+            # Results are merged in order, so the document is the same as converting them one by one
+            path_items = [self.paths[uri] for uri in dirty_paths]
+            for uri, path_item_json in zip(
+                dirty_paths, self.spec_executor.map(_dump_spec_object, path_items, chunksize=SPEC_CHUNKSIZE)
+            ):
+                self._paths_json[uri] = self._add_validation_error_responses(path_item_json)
+            schemas = [self.components_schemas[name] for name in dirty_schemas]
+            for name, schema_json in zip(
+                dirty_schemas, self.spec_executor.map(_dump_spec_object, schemas, chunksize=SPEC_CHUNKSIZE)
+            ):
+                self._schemas_json[name] = schema_json
+
+        self._spec_stale = False
+        self._dirty_paths = set()
+        self._dirty_schemas = set()
 
         # Set components
         self.components.schemas = self.components_schemas
         self.components.securitySchemes = self.security_schemes
         self.spec.components = self.components
 
-        # Convert spec to JSON
-        self.spec_json = self.spec.model_dump(mode="json", by_alias=True, exclude_unset=True, warnings=False)
+        # Convert spec to JSON, reusing the paths and component schemas converted above
+        spec_head = self.spec.model_dump(
+            mode="json",
+            by_alias=True,
+            exclude_unset=True,
+            warnings=False,
+            exclude={"paths": True, "components": {"schemas": True}},
+        )
+        spec_json = {key: spec_head.pop(key) for key in ("openapi", "info", "servers") if key in spec_head}
+        spec_json["paths"] = {uri: self._paths_json[uri] for uri in self.paths}
+        spec_json.update(spec_head)
+        schemas = {name: self._schemas_json[name] for name in self.components_schemas}
+        spec_json["components"] = {"schemas": schemas, **spec_json.get("components", {})}
 
         # Update with OpenAPI extensions
-        self.spec_json.update(**self.openapi_extensions)
+        spec_json.update(**self.openapi_extensions)
+
+        self.spec_json = spec_json
+
+    def _dump_path_item(self, path_item: PathItem) -> dict:
+        return self._add_validation_error_responses(_dump_spec_object(path_item))
 
+    def _add_validation_error_responses(self, path_item_json: dict) -> dict:
         # Handle validation error response
-        for rule, path_item in self.spec_json["paths"].items():
-            for http_method, operation in path_item.items():
-                if operation.get("responses") is None:
-                    operation["responses"] = {}
-                if operation["responses"].get(self.validation_error_status):
-                    continue
-                operation["responses"][self.validation_error_status] = {
-                    "description": HTTP_STATUS[self.validation_error_status],
-                    "content": {
-                        "application/json": {
-                            "schema": {
-                                "type": "array",
-                                "items": {"$ref": f"{OPENAPI3_REF_PREFIX}/{self.validation_error_model.__name__}"},
-                            }
+        for http_method, operation in path_item_json.items():
+            if operation.get("responses") is None:
+                operation["responses"] = {}
+            if operation["responses"].get(self.validation_error_status):
+                continue
+            operation["responses"][self.validation_error_status] = {
+                "description": HTTP_STATUS[self.validation_error_status],
+                "content": {
+                    "application/json": {
+                        "schema": {
+                            "type": "array",
+                            "items": {"$ref": f"{OPENAPI3_REF_PREFIX}/{self.validation_error_model.__name__}"},
                         }
-                    },
-                }
+                    }
+                },
+            }
+
+        return path_item_json
 
     def register_api(self, api: APIBlueprint, **options: Any) -> None:
         """
@@ -290,6 +674,22 @@ class OpenAPI(APIScaffold, Flask):
             url_defaults, Blueprint routes will use these default values for view arguments.
 
         """
+        if self.frozen_spec is not None:
+            # The specification is served from the frozen_spec file
+            pass
+        elif self.lazy_spec:
+            self._lazy_spec_collectors.append(partial(self._merge_api_spec, api, options.get("url_prefix")))
+            self._lazy_spec_models.extend(api._lazy_spec_models)
+        else:
+            self._merge_api_spec(api, options.get("url_prefix"))
+
+        # Register the APIBlueprint with the current instance
+        self.register_blueprint(api, **options)
+
+    def _merge_api_spec(self, api: APIBlueprint, url_prefix: str | None) -> None:
+        # Collect the OpenAPI info recorded in lazy_spec mode
+        api._load_lazy_spec()
+
         for tag in api.tags:
             if tag.name not in self.tag_names:
                 # Append tag to the list of tags
@@ -299,20 +699,20 @@ class OpenAPI(APIScaffold, Flask):
                 self.tag_names.append(tag.name)
 
         # Update paths with the APIBlueprint's paths
-        url_prefix = options.get("url_prefix")
         if url_prefix and api.url_prefix and url_prefix != api.url_prefix:
             api.paths = {url_prefix + k.removeprefix(api.url_prefix): v for k, v in api.paths.items()}
             api.url_prefix = url_prefix
         elif url_prefix and not api.url_prefix:
             api.paths = {url_prefix.rstrip("/") + "/" + k.lstrip("/"): v for k, v in api.paths.items()}
             api.url_prefix = url_prefix
-        self.paths.update(**api.paths)
 
         # Update component schemas with the APIBlueprint's component schemas
-        self.components_schemas.update(**api.components_schemas)
+        renames = merge_components_schemas(self.components_schemas, api.components_schemas, self.plain_schemas)
 
-        # Register the APIBlueprint with the current instance
-        self.register_blueprint(api, **options)
+        self.paths.update(**rename_schema_refs(api.paths, renames))
+
+        self._dirty_paths.update(api.paths)
+        self._dirty_schemas.update(renames.get(name, name) for name in api.components_schemas)
 
     def register_api_view(
         self, api_view: APIView, url_prefix: str | None = None, view_kwargs: dict[Any, Any] | None = None
@@ -328,6 +728,27 @@ class OpenAPI(APIScaffold, Flask):
         if view_kwargs is None:
             view_kwargs = {}
 
+        if self.frozen_spec is not None:
+            # The specification is served from the frozen_spec file
+            pass
+        elif self.lazy_spec:
+            self._lazy_spec_collectors.append(
+                partial(self._merge_api_view_spec, api_view, url_prefix, api_view.url_prefix)
+            )
+            self._lazy_spec_models.extend(api_view._lazy_spec_models)
+        else:
+            self._merge_api_view_spec(api_view, url_prefix, api_view.url_prefix)
+
+        if url_prefix:
+            api_view.url_prefix = url_prefix
+
+        # Register the APIView with the current instance
+        api_view.register(self, url_prefix=url_prefix, view_kwargs=view_kwargs)
+
+    def _merge_api_view_spec(self, api_view: APIView, url_prefix: str | None, view_url_prefix: str | None) -> None:
+        # Collect the OpenAPI info recorded in lazy_spec mode
+        api_view._load_lazy_spec()
+
         # Iterate through tags of the APIView
         for tag in api_view.tags:
             if tag.name not in self.tag_names:
@@ -338,19 +759,18 @@ class OpenAPI(APIScaffold, Flask):
                 self.tag_names.append(tag.name)
 
         # Update paths with the APIView's paths
-        if url_prefix and api_view.url_prefix and url_prefix != api_view.url_prefix:
-            api_view.paths = {url_prefix + k.removeprefix(api_view.url_prefix): v for k, v in api_view.paths.items()}
-            api_view.url_prefix = url_prefix
-        elif url_prefix and not api_view.url_prefix:
+        if url_prefix and view_url_prefix and url_prefix != view_url_prefix:
+            api_view.paths = {url_prefix + k.removeprefix(view_url_prefix): v for k, v in api_view.paths.items()}
+        elif url_prefix and not view_url_prefix:
             api_view.paths = {url_prefix.rstrip("/") + "/" + k.lstrip("/"): v for k, v in api_view.paths.items()}
-            api_view.url_prefix = url_prefix
-        self.paths.update(**api_view.paths)
 
         # Update component schemas with the APIView's component schemas
-        self.components_schemas.update(**api_view.components_schemas)
+        renames = merge_components_schemas(self.components_schemas, api_view.components_schemas, self.plain_schemas)
 
-        # Register the APIView with the current instance
-        api_view.register(self, url_prefix=url_prefix, view_kwargs=view_kwargs)
+        self.paths.update(**rename_schema_refs(api_view.paths, renames))
+
+        self._dirty_paths.update(api_view.paths)
+        self._dirty_schemas.update(renames.get(name, name) for name in api_view.components_schemas)
 
     def _add_url_rule(
         self,
@@ -399,7 +819,32 @@ class OpenAPI(APIScaffold, Flask):
             doc_ui: Declares this operation to be shown. Default to True.
             method: HTTP method for the operation. Defaults to GET.
         """
-        if doc_ui is True:
+        if doc_ui is True and self.frozen_spec is not None:
+            # The specification is served from the frozen_spec file, only build the request models
+            return parse_parameters(func, doc_ui=False)
+        elif doc_ui is True and self.lazy_spec:
+            # Only record the route, it is collected the first time the specification is accessed
+            self._lazy_spec_collectors.append(
+                partial(
+                    self._collect_openapi_info,
+                    rule,
+                    func,
+                    tags=tags,
+                    summary=summary,
+                    description=description,
+                    external_docs=external_docs,
+                    operation_id=operation_id,
+                    responses=responses,
+                    deprecated=deprecated,
+                    security=security,
+                    servers=servers,
+                    openapi_extensions=openapi_extensions,
+                    method=method,
+                )
+            )
+            self._lazy_spec_models.extend(get_response_models(responses))
+            return parse_parameters(func, doc_ui=False)
+        elif doc_ui is True:
             # Convert key to string
             new_responses = convert_responses_key_to_string(responses or {})
 
@@ -435,15 +880,26 @@ class OpenAPI(APIScaffold, Flask):
             parse_and_store_tags(tags or [], self.tags, self.tag_names, operation)
 
             # Parse response
-            get_responses(combine_responses, self.components_schemas, operation)
+            components_schemas: dict = dict()
+            get_responses(combine_responses, components_schemas, operation, self.plain_schemas)
 
             # Convert a route parameter format from /pet/<petId> to /pet/{petId}
             uri = re.sub(r"<([^<:]+:)?", "{", rule).replace(">", "}")
 
+            # Parse parameters
+            parameters = parse_parameters(
+                func, components_schemas=components_schemas, operation=operation, plain_schemas=self.plain_schemas
+            )
+
+            renames = merge_components_schemas(self.components_schemas, components_schemas, self.plain_schemas)
+            operation = rename_schema_refs(operation, renames)
+
             # Parse method
             parse_method(uri, method, self.paths, operation)
 
-            # Parse parameters
-            return parse_parameters(func, components_schemas=self.components_schemas, operation=operation)
+            self._dirty_paths.add(uri)
+            self._dirty_schemas.update(renames.get(name, name) for name in components_schemas)
+
+            return parameters
         else:
             return parse_parameters(func, doc_ui=False)
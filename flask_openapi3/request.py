@@ -1,74 +1,316 @@
 # -*- coding: utf-8 -*-
 # @Author  : llc
 # @Time    : 2022/4/1 16:54
+import asyncio
+import contextvars
 import inspect
 import json
-from functools import wraps
+import re
+from functools import partial, wraps
 from json import JSONDecodeError
-from typing import Any, Type
+from time import perf_counter
+from typing import IO, Any, Callable, NamedTuple, Type
 
 from flask import abort, current_app, request
-from pydantic import BaseModel, ValidationError
-from pydantic.fields import FieldInfo
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pydantic_core import PydanticCustomError
+from werkzeug.datastructures import FileStorage, Headers
 from werkzeug.datastructures.structures import MultiDict
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+from .models import RawModel
+from .signals import record_timing, send_timings
+from .utils import get_model_schema, parse_parameters
+
+# Matches a body that is a JSON string, e.g. `"{\"age\": 1}"`
+_JSON_STRING_START = re.compile(rb'[ \t\r\n]*"')
+
+
+class FieldPlan(NamedTuple):
+    """How a single model field is extracted from the request."""
+
+    # The key passed to the model, the alias if the field has one
+    key: str
+    # The keys looked up in the request data, in order of precedence
+    lookup: tuple[str, ...]
+    # One of "scalar", "list", "file" and "file_list"
+    kind: str
+    # The field type is `None`, so the key is kept even if the value is missing
+    nullable: bool
+    # The values are JSON encoded objects or arrays, only used by form fields
+    json: bool = False
+
+
+_FILE_SCHEMA = {"format": "binary", "type": "string"}
+
+
+def _get_field_kind(field_schema: dict, form: bool = False) -> str:
+    if field_schema.get("type") == "array":
+        if field_schema.get("items") == _FILE_SCHEMA:
+            # list[FileStorage]
+            return "file_list"
+        return "list"
+    any_of = field_schema.get("anyOf", [])
+    # To handle Optional[list[FileStorage]] and Optional[FileStorage]
+    if any(m.get("type") == "array" and m.get("items") == _FILE_SCHEMA for m in any_of):
+        return "file_list"
+    if _FILE_SCHEMA in any_of:
+        return "file"
+    # To handle Optional[list], a form sends it as a single JSON encoded value
+    if not form and any(m.get("type") == "array" for m in any_of):
+        return "list"
+    if field_schema.get("type") == "string" and field_schema.get("format") == "binary":
+        # FileStorage
+        return "file"
+    return "scalar"
+
+
+def _is_json_schema(field_schema: dict, defs: dict, seen: frozenset = frozenset()) -> bool:
+    """
+    Whether the values of a schema have to be sent JSON encoded in a form: objects, arrays,
+    and constants or enums that are not strings, e.g. `Literal[1, 2]`.
+    """
+    if field_schema.get("type") in ("object", "array"):
+        return True
+    if "const" in field_schema and not isinstance(field_schema["const"], str):
+        return True
+    if any(not isinstance(value, str) for value in field_schema.get("enum", ())):
+        return True
+    ref = field_schema.get("$ref")
+    if ref:
+        name = ref.rsplit("/", 1)[-1]
+        return name not in seen and _is_json_schema(defs.get(name, {}), defs, seen | {name})
+    return any(
+        _is_json_schema(sub_schema, defs, seen)
+        for sub_schema in (
+            *field_schema.get("anyOf", ()),
+            *field_schema.get("oneOf", ()),
+            *field_schema.get("allOf", ()),
+        )
+    )
+
+
+def _get_items_schema(field_schema: dict) -> dict:
+    if field_schema.get("type") == "array":
+        return field_schema.get("items", {})
+    # To handle Optional[list]
+    for sub_schema in field_schema.get("anyOf", []):
+        if sub_schema.get("type") == "array":
+            return sub_schema.get("items", {})
+    return {}
+
+
+def compile_fields(model: Type[BaseModel], title_case: bool = False, form: bool = False) -> tuple[FieldPlan, ...]:
+    """
+    Compile the extraction plan of a header, query or form model.
 
-from .utils import parse_parameters
-
-
-def _get_list_value(model: Type[BaseModel], args: MultiDict, model_field_key: str, model_field_value: FieldInfo):
-    if model_field_value.alias and model.model_config.get("populate_by_name"):
-        key = model_field_value.alias
-        value = args.getlist(model_field_value.alias) or args.getlist(model_field_key)
-    elif model_field_value.alias:
-        key = model_field_value.alias
-        value = args.getlist(model_field_value.alias)
-    else:
-        key = model_field_key
-        value = args.getlist(model_field_key)
+    Args:
+        model: The pydantic model.
+        title_case: Look up keys in the header format, e.g. `x_hello` becomes `X-Hello`.
+        form: The model is a form model.
 
-    return key, value
+    Returns:
+        A FieldPlan for each model field.
+    """
+    model_schema = get_model_schema(model)
+    model_properties = model_schema.get("properties", {})
+    model_defs = model_schema.get("$defs", {})
+    populate_by_name = model.model_config.get("populate_by_name")
+    fields = []
+    for model_field_key, model_field_value in model.model_fields.items():
+        model_field_schema = (
+            model_properties.get(model_field_value.alias or model_field_key)
+            or model_properties.get(model_field_key)
+            or {}
+        )
+        alias = model_field_value.alias
+        lookup: tuple[str, ...]
+        if alias and populate_by_name:
+            key = alias
+            lookup = (alias, model_field_key)
+        elif alias:
+            key = alias
+            lookup = (alias,)
+        else:
+            key = model_field_key
+            lookup = (model_field_key,)
+        if title_case:
+            lookup = tuple(k.replace("_", "-").title() for k in lookup)
+        kind = _get_field_kind(model_field_schema, form)
+        if kind == "list":
+            is_json = _is_json_schema(_get_items_schema(model_field_schema), model_defs)
+        else:
+            # A `None` field only accepts the JSON `null`
+            is_json = kind == "scalar" and (
+                _is_json_schema(model_field_schema, model_defs) or model_field_schema.get("type") == "null"
+            )
+        fields.append(
+            FieldPlan(
+                key=key,
+                lookup=lookup,
+                kind=kind,
+                nullable=model_field_schema.get("type") == "null",
+                json=is_json,
+            )
+        )
+    return tuple(fields)
+
+
+class FormStreamPlan(NamedTuple):
+    """How a form model is validated while its multipart body is streamed."""
+
+    # Validates a scalar field as soon as it arrives, by the name of the form field
+    validators: dict[str, tuple[FieldPlan, TypeAdapter]]
+    # The maximum size in bytes of the files of a field, by the name of the form field
+    max_sizes: dict[str, int]
+
+
+def _get_validated_fields(model: Type[BaseModel]) -> set[str]:
+    """The names of the fields that have validators in the model, `*` if a model validator sees the raw input."""
+    decorators = model.__pydantic_decorators__
+    validated_fields: set[str] = set()
+    for field_validator in decorators.field_validators.values():
+        validated_fields.update(field_validator.info.fields)
+    for validator in decorators.validators.values():
+        validated_fields.update(validator.info.fields)
+    if any(decorator.info.mode in ("before", "wrap") for decorator in decorators.model_validators.values()):
+        validated_fields.add("*")
+    return validated_fields
+
+
+def compile_form_stream(model: Type[BaseModel], fields: tuple[FieldPlan, ...]) -> FormStreamPlan:
+    """
+    Compile the streaming plan of a form model.
 
+    The maximum size of a file field is the `maxLength` of its schema, for example
+    `Field(json_schema_extra={"maxLength": 1024})`.
 
-def _get_value(model: Type[BaseModel], args: MultiDict, model_field_key: str, model_field_value: FieldInfo):
-    if model_field_value.alias and model.model_config.get("populate_by_name"):
-        key = model_field_value.alias
-        value = args.get(model_field_value.alias) or args.get(model_field_key)
-    elif model_field_value.alias:
-        key = model_field_value.alias
-        value = args.get(model_field_value.alias)
-    else:
-        key = model_field_key
-        value = args.get(model_field_key)
+    Args:
+        model: The pydantic model.
+        fields: The extraction plan of the model, see `compile_fields`.
 
-    return key, value
+    Returns:
+        The FormStreamPlan of the model.
+    """
+    model_properties = get_model_schema(model).get("properties", {})
+    validated_fields = _get_validated_fields(model)
+    validators = {}
+    max_sizes = {}
+    for field, (name, model_field) in zip(fields, model.model_fields.items()):
+        if field.kind == "scalar":
+            if "*" in validated_fields or name in validated_fields:
+                # The validators of the model may change the value, it is only validated with the whole model
+                continue
+            adapter: TypeAdapter = TypeAdapter(model_field.rebuild_annotation())
+            for key in field.lookup:
+                validators[key] = (field, adapter)
+        elif field.kind in ("file", "file_list"):
+            field_schema = model_properties.get(field.key, {})
+            if field.kind == "file_list":
+                field_schema = field_schema.get("items", {})
+            if "maxLength" in field_schema:
+                for key in field.lookup:
+                    max_sizes[key] = field_schema["maxLength"]
+    return FormStreamPlan(validators, max_sizes)
+
+
+class RequestPlan:
+    """
+    The request models of a route along with their precompiled extraction plans.
 
+    The plan is built once when the route is registered, so that a request only has to
+    run it against `request.headers`, `request.args` and `request.form`.
+    """
 
-def _validate_header(header: Type[BaseModel], func_kwargs: dict):
-    request_headers = dict(request.headers)
+    __slots__ = (
+        "header",
+        "cookie",
+        "path",
+        "query",
+        "form",
+        "body",
+        "raw",
+        "header_fields",
+        "header_extra",
+        "query_fields",
+        "form_fields",
+        "form_stream",
+        "phases",
+        "fail_fast_phases",
+    )
+
+    def __init__(
+        self,
+        header: Type[BaseModel] | None = None,
+        cookie: Type[BaseModel] | None = None,
+        path: Type[BaseModel] | None = None,
+        query: Type[BaseModel] | None = None,
+        form: Type[BaseModel] | None = None,
+        body: Type[BaseModel] | None = None,
+        raw: Type[RawModel] | None = None,
+    ) -> None:
+        self.header = header
+        self.cookie = cookie
+        self.path = path
+        self.query = query
+        self.form = form
+        self.body = body
+        self.raw = raw
+        self.header_fields = compile_fields(header, title_case=True) if header else ()
+        # Undeclared headers only matter if the model keeps or rejects extra fields
+        self.header_extra = header is not None and header.model_config.get("extra") in ("allow", "forbid")
+        self.query_fields = compile_fields(query) if query else ()
+        self.form_fields = compile_fields(form, form=True) if form else ()
+        # Forms whose model sets `stream_form` are validated while the multipart body is read
+        self.form_stream = (
+            compile_form_stream(form, self.form_fields) if form and form.model_config.get("stream_form") else None
+        )
+        # The validation phases that apply to this route, in the order they run
+        self.phases: tuple[tuple[str, Callable], ...] = tuple(
+            (name, run) for name, run in _REQUEST_PHASES if getattr(self, name)
+        )
+        # The same phases, cheapest first, used with `fail_fast_validation`
+        self.fail_fast_phases: tuple[tuple[str, Callable], ...] = tuple(
+            sorted(self.phases, key=lambda phase: _FAIL_FAST_ORDER.index(phase[0]))
+        )
+
+
+def _get_list_value(args: MultiDict, field: FieldPlan) -> list:
+    value: list = []
+    for key in field.lookup:
+        value = args.getlist(key)
+        if value:
+            break
+    return value
+
+
+def _get_value(args: MultiDict | Headers | dict, field: FieldPlan) -> Any:
+    value = None
+    for key in field.lookup:
+        value = args.get(key)
+        if value:
+            break
+    return value
+
+
+def _validate_header(
+    header: Type[BaseModel], fields: tuple[FieldPlan, ...], func_kwargs: dict, copy_extra: bool = True
+):
+    # Look up the declared headers straight from the WSGI environ, case-insensitively
+    request_headers = request.headers
     header_dict = {}
-    model_properties = header.model_json_schema().get("properties", {})
-    for model_field_key, model_field_value in header.model_fields.items():
-        key_title = model_field_key.replace("_", "-").title()
-        model_field_schema = model_properties.get(model_field_value.alias or model_field_key)
-        if model_field_value.alias and header.model_config.get("populate_by_name"):
-            key = model_field_value.alias
-            key_alias_title = model_field_value.alias.replace("_", "-").title()
-            value = request_headers.get(key_alias_title) or request_headers.get(key_title)
-        elif model_field_value.alias:
-            key = model_field_value.alias
-            key_alias_title = model_field_value.alias.replace("_", "-").title()
-            value = request_headers.get(key_alias_title)
-        else:
-            key = model_field_key
-            value = request_headers[key_title]
+    for field in fields:
+        value = _get_value(request_headers, field)
         if value is not None:
-            header_dict[key] = value
-        if model_field_schema.get("type") == "null":
-            header_dict[key] = value  # type:ignore
-    # extra keys
-    for key, value in request_headers.items():
-        if key not in header_dict.keys():
-            header_dict[key] = value
+            header_dict[field.key] = value
+        if field.nullable:
+            header_dict[field.key] = value
+    if copy_extra:
+        # extra keys
+        for key, value in request_headers.items():
+            if key not in header_dict.keys():
+                header_dict[key] = value
     func_kwargs["header"] = header.model_validate(obj=header_dict)
 
 
@@ -85,23 +327,19 @@ def _validate_path(path: Type[BaseModel], path_kwargs: dict, func_kwargs: dict):
         path_kwargs.pop(field_name, None)
 
 
-def _validate_query(query: Type[BaseModel], func_kwargs: dict):
+def _validate_query(query: Type[BaseModel], fields: tuple[FieldPlan, ...], func_kwargs: dict):
     request_args = request.args
     query_dict = {}
-    model_properties = query.model_json_schema().get("properties", {})
-    for model_field_key, model_field_value in query.model_fields.items():
-        model_field_schema = model_properties.get(model_field_value.alias or model_field_key)
-        if model_field_schema.get("type") == "array":
-            key, value = _get_list_value(query, request_args, model_field_key, model_field_value)
-        # To handle Optional[list]
-        elif any(m.get("type") == "array" for m in model_field_schema.get("anyOf", [])):
-            key, value = _get_list_value(query, request_args, model_field_key, model_field_value)
+    for field in fields:
+        value: Any
+        if field.kind == "list":
+            value = _get_list_value(request_args, field)
         else:
-            key, value = _get_value(query, request_args, model_field_key, model_field_value)
+            value = _get_value(request_args, field)
         if value is not None and value != []:
-            query_dict[key] = value
-        if model_field_schema.get("type") == "null":
-            query_dict[key] = value
+            query_dict[field.key] = value
+        if field.nullable:
+            query_dict[field.key] = value
     # extra keys
     for key, value in request_args.items():
         if key not in query_dict.keys():
@@ -109,38 +347,157 @@ def _validate_query(query: Type[BaseModel], func_kwargs: dict):
     func_kwargs["query"] = query.model_validate(obj=query_dict)
 
 
-def _validate_form(form: Type[BaseModel], func_kwargs: dict):
-    request_form = request.form
-    request_files = request.files
+def _decode_form_value(field: FieldPlan, value: Any) -> Any:
+    """Decode the JSON encoded objects and arrays of a form, other values are coerced by pydantic."""
+    if not field.json or value is None:
+        return value
+    try:
+        return json.loads(value)
+    except JSONDecodeError:
+        # Let pydantic report the invalid value
+        return value
+
+
+def _field_validation_error(model: Type[BaseModel], field: FieldPlan, e: ValidationError) -> ValidationError:
+    """Turn the validation error of a single field into the one of its model."""
+    line_errors: list[Any] = []
+    for error in e.errors(include_url=False):
+        line_error = {"type": error["type"], "loc": (field.key, *error["loc"]), "input": error["input"]}
+        if "ctx" in error:
+            line_error["ctx"] = error["ctx"]
+        line_errors.append(line_error)
+    try:
+        return ValidationError.from_exception_data(model.__name__, line_errors)
+    except (KeyError, TypeError, ValueError):
+        # Custom error types can't be rebuilt from their name
+        for line_error, error in zip(line_errors, e.errors(include_url=False)):
+            line_error["type"] = PydanticCustomError(error["type"], error["msg"].replace("{", "{{").replace("}", "}}"))
+            line_error.pop("ctx", None)
+        return ValidationError.from_exception_data(model.__name__, line_errors)
+
+
+def _stream_form(form: Type[BaseModel], plan: FormStreamPlan) -> tuple[MultiDict, MultiDict]:
+    """
+    Parse a multipart body from `request.stream`, validating the scalar fields as soon as they arrive
+    and the size of the files while they are written, so that an invalid upload is rejected early.
+    """
+    boundary = request.mimetype_params.get("boundary", "").encode("latin1")
+    decoder = MultipartDecoder(
+        boundary, max_form_memory_size=request.max_form_memory_size, max_parts=request.max_form_parts
+    )
+    stream = request.stream
+    fields: list[tuple[str, str]] = []
+    files: list[tuple[str, FileStorage]] = []
+    current_part: Field | File | None = None
+    container: list[bytes] = []
+    file_container: IO[bytes] | None = None
+    size = 0
+    max_size: int | None = None
+
+    try:
+        while True:
+            event = decoder.next_event()
+            if isinstance(event, NeedData):
+                decoder.receive_data(stream.read(64 * 1024) or None)
+            elif isinstance(event, Epilogue):
+                break
+            elif isinstance(event, Field):
+                current_part, container, size = event, [], 0
+            elif isinstance(event, File):
+                current_part, size = event, 0
+                max_size = plan.max_sizes.get(event.name)
+                # Files are spooled to a temporary file like werkzeug does
+                file_container = request._get_file_stream(
+                    request.content_length, event.headers.get("content-type"), event.filename
+                )
+            elif isinstance(event, Data):
+                size += len(event.data)
+                if isinstance(current_part, Field):
+                    if request.max_form_memory_size is not None and size > request.max_form_memory_size:
+                        raise RequestEntityTooLarge()
+                    container.append(event.data)
+                    if not event.more_data:
+                        value = b"".join(container).decode("utf-8", "replace")
+                        fields.append((current_part.name, value))
+                        if current_part.name in plan.validators:
+                            field, adapter = plan.validators[current_part.name]
+                            try:
+                                adapter.validate_python(_decode_form_value(field, value))
+                            except ValidationError as e:
+                                raise _field_validation_error(form, field, e) from None
+                elif isinstance(current_part, File) and file_container is not None:
+                    if max_size is not None and size > max_size:
+                        file_container.close()
+                        raise ValidationError.from_exception_data(
+                            form.__name__,
+                            [
+                                {
+                                    "type": PydanticCustomError(
+                                        "file_too_large",
+                                        "File should be at most {max_size} bytes",
+                                        {"max_size": max_size},
+                                    ),
+                                    "loc": (current_part.name,),
+                                    "input": current_part.filename,
+                                }
+                            ],
+                        )
+                    file_container.write(event.data)
+                    if not event.more_data:
+                        file_container.seek(0)
+                        files.append(
+                            (
+                                current_part.name,
+                                FileStorage(
+                                    file_container,
+                                    current_part.filename,
+                                    current_part.name,
+                                    headers=current_part.headers,
+                                ),
+                            )
+                        )
+    except ValidationError:
+        raise
+    except ValueError:
+        # A malformed body is parsed as an empty form, like werkzeug does
+        fields, files = [], []
+
+    request_form = request.parameter_storage_class(fields)
+    request_files = request.parameter_storage_class(files)
+    # Keep `request.form` and `request.files` available to the view function
+    request.__dict__["form"] = request_form
+    request.__dict__["files"] = request_files
+    return request_form, request_files
+
+
+def _validate_form(
+    form: Type[BaseModel], fields: tuple[FieldPlan, ...], func_kwargs: dict, stream_plan: FormStreamPlan | None = None
+):
+    if (
+        stream_plan is not None
+        and request.mimetype == "multipart/form-data"
+        # The body has not been read yet
+        and "form" not in request.__dict__
+        and getattr(request, "_cached_data", None) is None
+    ):
+        request_form, request_files = _stream_form(form, stream_plan)
+    else:
+        request_form = request.form
+        request_files = request.files
     form_dict = {}
-    model_properties = form.model_json_schema().get("properties", {})
-    for model_field_key, model_field_value in form.model_fields.items():
-        model_field_schema = model_properties.get(model_field_value.alias or model_field_key)
-        if model_field_schema.get("type") == "array":
-            if model_field_schema.get("items") == {"format": "binary", "type": "string"}:
-                # list[FileStorage]
-                key, value = _get_list_value(form, request_files, model_field_key, model_field_value)
-            else:
-                value = []
-                key, value_list = _get_list_value(form, request_form, model_field_key, model_field_value)
-                for _value in value_list:
-                    try:
-                        value.append(json.loads(_value))
-                    except (JSONDecodeError, TypeError):
-                        value.append(_value)
-        elif model_field_schema.get("type") == "string" and model_field_schema.get("format") == "binary":
-            # FileStorage
-            key, value = _get_value(form, request_files, model_field_key, model_field_value)
+    for field in fields:
+        if field.kind == "file_list":
+            value = _get_list_value(request_files, field)
+        elif field.kind == "list":
+            value = [_decode_form_value(field, _value) for _value in _get_list_value(request_form, field)]
+        elif field.kind == "file":
+            value = _get_value(request_files, field)
         else:
-            key, _value = _get_value(form, request_form, model_field_key, model_field_value)
-            try:
-                value = json.loads(_value)
-            except (JSONDecodeError, TypeError):
-                value = _value
+            value = _decode_form_value(field, _get_value(request_form, field))
         if value is not None and value != []:
-            form_dict[key] = value
-        if model_field_schema.get("type") == "null":
-            form_dict[key] = value
+            form_dict[field.key] = value
+        if field.nullable:
+            form_dict[field.key] = value
     # extra keys
     for key, value in {**dict(request_form), **dict(request_files)}.items():
         if key not in form_dict.keys():
@@ -149,6 +506,19 @@ def _validate_form(form: Type[BaseModel], func_kwargs: dict):
 
 
 def _validate_body(body: Type[BaseModel], func_kwargs: dict):
+    if request.is_json:
+        data = request.get_data()
+        # A JSON string body is validated as embedded JSON below, keep that behavior
+        if data and not _JSON_STRING_START.match(data):
+            try:
+                # Parse and validate the raw bytes in a single pass
+                func_kwargs["body"] = body.model_validate_json(json_data=data)
+                return
+            except ValidationError as e:
+                if not any(error["type"] == "json_invalid" for error in e.errors(include_url=False)):
+                    raise
+                # Invalid JSON for pydantic, fall back to the JSON provider of the app
+
     obj = request.get_json(silent=True)
     if isinstance(obj, str):
         body_model = body.model_validate_json(json_data=obj)
@@ -157,6 +527,32 @@ def _validate_body(body: Type[BaseModel], func_kwargs: dict):
     func_kwargs["body"] = body_model
 
 
+# Runs a validation phase of the request plan, each one is called with (plan, path_kwargs, func_kwargs).
+# A phase only runs if the plan has its model, the plan is typed Any since the models are optional attributes.
+_REQUEST_PHASES: tuple[tuple[str, Callable[[Any, dict, dict], None]], ...] = (
+    (
+        "header",
+        lambda plan, path_kwargs, func_kwargs: _validate_header(
+            plan.header, plan.header_fields, func_kwargs, plan.header_extra
+        ),
+    ),
+    ("cookie", lambda plan, path_kwargs, func_kwargs: _validate_cookie(plan.cookie, func_kwargs)),
+    ("path", lambda plan, path_kwargs, func_kwargs: _validate_path(plan.path, path_kwargs, func_kwargs)),
+    ("query", lambda plan, path_kwargs, func_kwargs: _validate_query(plan.query, plan.query_fields, func_kwargs)),
+    (
+        "form",
+        lambda plan, path_kwargs, func_kwargs: _validate_form(
+            plan.form, plan.form_fields, func_kwargs, plan.form_stream
+        ),
+    ),
+    ("body", lambda plan, path_kwargs, func_kwargs: _validate_body(plan.body, func_kwargs)),
+    ("raw", lambda plan, path_kwargs, func_kwargs: func_kwargs.__setitem__("raw", request)),
+)
+
+# Path parameters are already parsed by the URL map, and the body is only read once everything else is valid
+_FAIL_FAST_ORDER = ("path", "header", "cookie", "query", "form", "body", "raw")
+
+
 def _validate_request(
     header: Type[BaseModel] | None = None,
     cookie: Type[BaseModel] | None = None,
@@ -164,8 +560,10 @@ def _validate_request(
     query: Type[BaseModel] | None = None,
     form: Type[BaseModel] | None = None,
     body: Type[BaseModel] | None = None,
-    raw: Type[BaseModel] | None = None,
+    raw: Type[RawModel] | None = None,
     path_kwargs: dict[Any, Any] | None = None,
+    request_plan: RequestPlan | None = None,
+    timings: dict[str, float] | None = None,
 ) -> dict:
     """
     Validate requests and responses.
@@ -178,6 +576,8 @@ def _validate_request(
         form: Form model.
         body: Body model.
         path_kwargs: Path parameters.
+        request_plan: Precompiled request plan, takes precedence over the models.
+        timings: Records the time spent in each phase when given.
 
     Returns:
         dict: Request kwargs.
@@ -185,34 +585,75 @@ def _validate_request(
     Raises:
         ValidationError: If validation fails.
     """
+    if request_plan is None:
+        request_plan = RequestPlan(header, cookie, path, query, form, body, raw)
+    if path_kwargs is None:
+        path_kwargs = {}
 
     # Dictionary to store func kwargs
     func_kwargs: dict = {}
 
+    if getattr(current_app, "fail_fast_validation", False):
+        phases = request_plan.fail_fast_phases
+    else:
+        phases = request_plan.phases
+
+    name = ""
+    start = perf_counter() if timings is not None else 0.0
     try:
-        # Validate header, cookie, path, and query parameters
-        if header:
-            _validate_header(header, func_kwargs)
-        if cookie:
-            _validate_cookie(cookie, func_kwargs)
-        if path:
-            _validate_path(path, path_kwargs or {}, func_kwargs)
-        if query:
-            _validate_query(query, func_kwargs)
-        if form:
-            _validate_form(form, func_kwargs)
-        if body:
-            _validate_body(body, func_kwargs)
-        if raw:
-            func_kwargs["raw"] = request
+        # Validate header, cookie, path, query, form and body
+        if timings is None:
+            for name, run in phases:
+                run(request_plan, path_kwargs, func_kwargs)
+        else:
+            for name, run in phases:
+                run(request_plan, path_kwargs, func_kwargs)
+                start = record_timing(timings, name, start)
     except ValidationError as e:
         # Create a response with validation error details
         validation_error_callback = getattr(current_app, "validation_error_callback")
-        abort(validation_error_callback(e))
+        response = validation_error_callback(e)
+        if timings is not None:
+            record_timing(timings, name, start)
+            response = send_timings(timings, response)
+        abort(response)
 
     return func_kwargs
 
 
+async def _validate_request_async(
+    path_kwargs: dict[Any, Any] | None = None,
+    request_plan: RequestPlan | None = None,
+    timings: dict[str, float] | None = None,
+) -> dict:
+    """
+    Validate the request of an async view function.
+
+    Requests whose body is at least `async_validation_threshold` bytes are read and validated in
+    `async_validation_executor`, so that they don't block the event loop. Smaller requests are validated inline.
+
+    Args:
+        path_kwargs: Path parameters.
+        request_plan: Precompiled request plan.
+        timings: Records the time spent in each phase when given.
+
+    Returns:
+        dict: Request kwargs.
+    """
+    threshold = getattr(current_app, "async_validation_threshold", None)
+    content_length = request.content_length
+    if threshold is None or content_length is None or content_length < threshold:
+        return _validate_request(path_kwargs=path_kwargs, request_plan=request_plan, timings=timings)
+
+    # Run in a copy of the context, so that the request and the app are available in the thread
+    context = contextvars.copy_context()
+    executor = getattr(current_app, "async_validation_executor", None)
+    return await asyncio.get_running_loop().run_in_executor(
+        executor,
+        partial(context.run, _validate_request, path_kwargs=path_kwargs, request_plan=request_plan, timings=timings),
+    )
+
+
 def validate_request():
     """
     Decorator to validate the annotated parts of the function and throw and error if applicable.
@@ -223,12 +664,20 @@ def validate_request():
 
         is_coroutine_function = inspect.iscoroutinefunction(func)
 
+        # Resolved on the first call, so that forward references can be defined after decorating
+        request_plan: RequestPlan | None = None
+
+        def get_request_plan() -> RequestPlan:
+            nonlocal request_plan
+            if request_plan is None:
+                request_plan = RequestPlan(*parse_parameters(func, doc_ui=False))
+            return request_plan
+
         if is_coroutine_function:
 
             @wraps(func)
             async def wrapper(*args, **kwargs):
-                header, cookie, path, query, form, body, raw = parse_parameters(func)
-                func_kwargs = _validate_request(header, cookie, path, query, form, body, raw, path_kwargs=kwargs)
+                func_kwargs = await _validate_request_async(path_kwargs=kwargs, request_plan=get_request_plan())
                 # Update func_kwargs with any additional keyword arguments passed from other decorators or calls.
                 func_kwargs.update(kwargs)
 
@@ -239,8 +688,7 @@ def validate_request():
 
             @wraps(func)
             def wrapper(*args, **kwargs):
-                header, cookie, path, query, form, body, raw = parse_parameters(func)
-                func_kwargs = _validate_request(header, cookie, path, query, form, body, raw, path_kwargs=kwargs)
+                func_kwargs = _validate_request(path_kwargs=kwargs, request_plan=get_request_plan())
                 # Update func_kwargs with any additional keyword arguments passed from other decorators or calls.
                 func_kwargs.update(kwargs)
                 return func(*args, **func_kwargs)
@@ -2,19 +2,72 @@
 # @Author  : llc
 # @Time    : 2022/8/30 9:40
 import inspect
+import threading
 from functools import wraps
+from random import random
+from time import perf_counter
 from typing import Any, Callable
 
-from flask import current_app
+from flask import after_this_request, current_app, request
 from flask.wrappers import Response as FlaskResponse
+from pydantic import ValidationError
 
 from .models import ExternalDocumentation, Server, Tag
-from .request import _validate_request
+from .request import RequestPlan, _validate_request, _validate_request_async
+from .signals import record_timing, send_timings, timing_enabled
 from .types import ParametersTuple, ResponseDict
-from .utils import HTTPMethod
+from .utils import HTTPMethod, ResponseModels, logger, make_model_response, run_validate_response
+
+
+def _run_validate_response(
+    response: Any, responses: ResponseDict | ResponseModels | None, response_models: ResponseModels
+) -> Any:
+    """Run `validate_response_callback` according to the `validate_response_mode` of the app."""
+    validate_response_callback = getattr(current_app, "validate_response_callback")
+    if validate_response_callback is run_validate_response:
+        # The default callback looks up the precompiled models, custom ones get the responses of the route
+        responses = response_models
+    mode = getattr(current_app, "validate_response_mode", "raise")
+    if mode == "raise":
+        return validate_response_callback(response, responses)
+
+    # Report violations instead of failing the request
+    error_callback = getattr(current_app, "response_validation_error_callback")
+    endpoint = request.endpoint
+
+    def check_response():
+        try:
+            return validate_response_callback(response, responses)
+        except ValidationError as e:
+            error_callback(e, endpoint)
+            return response
+
+    if mode == "background":
+        # Validate once the response has been sent, when the contexts of the request have been torn down
+        app = current_app._get_current_object()  # type: ignore[attr-defined]
+
+        def check_response_in_context() -> None:
+            with app.app_context():
+                try:
+                    check_response()
+                except Exception:
+                    # Nothing can handle an exception raised when closing the response
+                    logger.exception("Response validation of %r failed", endpoint)
+
+        @after_this_request
+        def validate_on_close(resp: FlaskResponse) -> FlaskResponse:
+            resp.call_on_close(check_response_in_context)
+            return resp
+
+        return response
+
+    return check_response()
 
 
 class APIScaffold:
+    lazy_spec: bool
+    _lazy_spec_collectors: list[Callable]
+
     def _collect_openapi_info(
         self,
         rule: str,
@@ -38,6 +91,16 @@ class APIScaffold:
     def register_api(self, api) -> None:
         raise NotImplementedError  # pragma: no cover
 
+    def _load_lazy_spec(self) -> None:
+        """Collect the OpenAPI info recorded in `lazy_spec` mode."""
+        collectors, self._lazy_spec_collectors = self._lazy_spec_collectors, []
+        lazy_spec, self.lazy_spec = self.lazy_spec, False
+        try:
+            for collector in collectors:
+                collector()
+        finally:
+            self.lazy_spec = lazy_spec
+
     def _add_url_rule(
         self,
         rule,
@@ -61,38 +124,55 @@ class APIScaffold:
         view_class=None,
         view_kwargs=None,
         responses: ResponseDict | None = None,
-        validate_response: bool | None = None,
+        validate_response: bool | float | None = None,
+        reuse_view_object: bool = False,
     ):
+        # Compile the request plan once, rather than introspecting the models on every request
+        request_plan = RequestPlan(header, cookie, path, query, form, body, raw)
+        # Look up the response model of a status code with a single dict hit
+        response_models = ResponseModels(responses) if responses else None
+
+        if view_class:
+            # Decide once whether the view class accepts view_kwargs
+            if inspect.signature(view_class.__init__).parameters.get("view_kwargs"):
+                view_class_kwargs = {"view_kwargs": view_kwargs}
+            else:
+                view_class_kwargs = {}
+
+            # Stateless views may share one instance per thread instead of one per request
+            view_objects = threading.local() if reuse_view_object else None
+
+            def get_view_object():
+                if view_objects is None:
+                    return view_class(**view_class_kwargs)
+                view_object = getattr(view_objects, "view_object", None)
+                if view_object is None:
+                    view_object = view_objects.view_object = view_class(**view_class_kwargs)
+                return view_object
+
         is_coroutine_function = inspect.iscoroutinefunction(func)
         if is_coroutine_function:
 
             @wraps(func)
             async def view_func(**kwargs) -> FlaskResponse:
+                # Only time the phases of the request if something consumes the timings
+                timings: dict[str, float] | None = {} if timing_enabled() else None
+
                 if hasattr(func, "__delay_validate_request__") and func.__delay_validate_request__ is True:
                     func_kwargs = kwargs
                 else:
-                    func_kwargs = _validate_request(
-                        header=header,
-                        cookie=cookie,
-                        path=path,
-                        query=query,
-                        form=form,
-                        body=body,
-                        raw=raw,
-                        path_kwargs=kwargs,
+                    func_kwargs = await _validate_request_async(
+                        path_kwargs=kwargs, request_plan=request_plan, timings=timings
                     )
 
                 # handle async request
+                start = perf_counter() if timings is not None else 0.0
                 if view_class:
-                    signature = inspect.signature(view_class.__init__)
-                    parameters = signature.parameters
-                    if parameters.get("view_kwargs"):
-                        view_object = view_class(view_kwargs=view_kwargs)
-                    else:
-                        view_object = view_class()
-                    response = await func(view_object, **func_kwargs)
+                    response = await func(get_view_object(), **func_kwargs)
                 else:
                     response = await func(**func_kwargs)
+                if timings is not None:
+                    start = record_timing(timings, "handler", start)
 
                 if hasattr(current_app, "validate_response"):
                     if validate_response is None:
@@ -102,40 +182,38 @@ class APIScaffold:
                 else:
                     _validate_response = validate_response
 
-                if _validate_response and responses:
-                    validate_response_callback = getattr(current_app, "validate_response_callback")
-                    return validate_response_callback(response, responses)
-
-                return response
+                if (
+                    _validate_response
+                    and response_models is not None
+                    and (_validate_response is True or random() < _validate_response)
+                ):
+                    response = _run_validate_response(response, responses, response_models)
+                    if timings is not None:
+                        record_timing(timings, "validate_response", start)
+
+                if timings is not None:
+                    return send_timings(timings, make_model_response(response))
+                return make_model_response(response)
         else:
 
             @wraps(func)
             def view_func(**kwargs) -> FlaskResponse:
+                # Only time the phases of the request if something consumes the timings
+                timings: dict[str, float] | None = {} if timing_enabled() else None
+
                 if hasattr(func, "__delay_validate_request__") and func.__delay_validate_request__ is True:
                     func_kwargs = kwargs
                 else:
-                    func_kwargs = _validate_request(
-                        header=header,
-                        cookie=cookie,
-                        path=path,
-                        query=query,
-                        form=form,
-                        body=body,
-                        raw=raw,
-                        path_kwargs=kwargs,
-                    )
+                    func_kwargs = _validate_request(path_kwargs=kwargs, request_plan=request_plan, timings=timings)
 
                 # handle request
+                start = perf_counter() if timings is not None else 0.0
                 if view_class:
-                    signature = inspect.signature(view_class.__init__)
-                    parameters = signature.parameters
-                    if parameters.get("view_kwargs"):
-                        view_object = view_class(view_kwargs=view_kwargs)
-                    else:
-                        view_object = view_class()
-                    response = func(view_object, **func_kwargs)
+                    response = func(get_view_object(), **func_kwargs)
                 else:
                     response = func(**func_kwargs)
+                if timings is not None:
+                    start = record_timing(timings, "handler", start)
 
                 if hasattr(current_app, "validate_response"):
                     if validate_response is None:
@@ -145,11 +223,18 @@ class APIScaffold:
                 else:
                     _validate_response = validate_response
 
-                if _validate_response and responses:
-                    validate_response_callback = getattr(current_app, "validate_response_callback")
-                    return validate_response_callback(response, responses)
+                if (
+                    _validate_response
+                    and response_models is not None
+                    and (_validate_response is True or random() < _validate_response)
+                ):
+                    response = _run_validate_response(response, responses, response_models)
+                    if timings is not None:
+                        record_timing(timings, "validate_response", start)
 
-                return response
+                if timings is not None:
+                    return send_timings(timings, make_model_response(response))
+                return make_model_response(response)
 
         if not hasattr(func, "view"):
             func.view = view_func
@@ -170,7 +255,7 @@ class APIScaffold:
         security: list[dict[str, list[Any]]] | None = None,
         servers: list[Server] | None = None,
         openapi_extensions: dict[str, Any] | None = None,
-        validate_response: bool | None = None,
+        validate_response: bool | float | None = None,
         doc_ui: bool = True,
         **options: Any,
     ) -> Callable:
@@ -191,7 +276,7 @@ class APIScaffold:
             servers: An alternative server array to service this operation.
             openapi_extensions: Allows extensions to the OpenAPI Schema.
             doc_ui: Declares this operation to be shown. Default to True.
-            validate_response: Verify the response body.
+            validate_response: Verify the response body, or only a sampled fraction of them if it is a float.
         """
 
         def decorator(func) -> Callable:
@@ -247,7 +332,7 @@ class APIScaffold:
         security: list[dict[str, list[Any]]] | None = None,
         servers: list[Server] | None = None,
         openapi_extensions: dict[str, Any] | None = None,
-        validate_response: bool | None = None,
+        validate_response: bool | float | None = None,
         doc_ui: bool = True,
         **options: Any,
     ) -> Callable:
@@ -268,7 +353,7 @@ class APIScaffold:
             servers: An alternative server array to service this operation.
             openapi_extensions: Allows extensions to the OpenAPI Schema.
             doc_ui: Declares this operation to be shown. Default to True.
-            validate_response: Verify the response body.
+            validate_response: Verify the response body, or only a sampled fraction of them if it is a float.
         """
 
         def decorator(func) -> Callable:
@@ -324,7 +409,7 @@ class APIScaffold:
         security: list[dict[str, list[Any]]] | None = None,
         servers: list[Server] | None = None,
         openapi_extensions: dict[str, Any] | None = None,
-        validate_response: bool | None = None,
+        validate_response: bool | float | None = None,
         doc_ui: bool = True,
         **options: Any,
     ) -> Callable:
@@ -345,7 +430,7 @@ class APIScaffold:
             servers: An alternative server array to service this operation.
             openapi_extensions: Allows extensions to the OpenAPI Schema.
             doc_ui: Declares this operation to be shown. Default to True.
-            validate_response: Verify the response body.
+            validate_response: Verify the response body, or only a sampled fraction of them if it is a float.
         """
 
         def decorator(func) -> Callable:
@@ -401,7 +486,7 @@ class APIScaffold:
         security: list[dict[str, list[Any]]] | None = None,
         servers: list[Server] | None = None,
         openapi_extensions: dict[str, Any] | None = None,
-        validate_response: bool | None = None,
+        validate_response: bool | float | None = None,
         doc_ui: bool = True,
         **options: Any,
     ) -> Callable:
@@ -422,7 +507,7 @@ class APIScaffold:
             servers: An alternative server array to service this operation.
             openapi_extensions: Allows extensions to the OpenAPI Schema.
             doc_ui: Declares this operation to be shown. Default to True.
-            validate_response: Verify the response body.
+            validate_response: Verify the response body, or only a sampled fraction of them if it is a float.
         """
 
         def decorator(func) -> Callable:
@@ -478,7 +563,7 @@ class APIScaffold:
         security: list[dict[str, list[Any]]] | None = None,
         servers: list[Server] | None = None,
         openapi_extensions: dict[str, Any] | None = None,
-        validate_response: bool | None = None,
+        validate_response: bool | float | None = None,
         doc_ui: bool = True,
         **options: Any,
     ) -> Callable:
@@ -499,7 +584,7 @@ class APIScaffold:
             servers: An alternative server array to service this operation.
             openapi_extensions: Allows extensions to the OpenAPI Schema.
             doc_ui: Declares this operation to be shown. Default to True.
-            validate_response: Verify the response body.
+            validate_response: Verify the response body, or only a sampled fraction of them if it is a float.
         """
 
         def decorator(func) -> Callable:
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# @Author  : llc
+# @Time    : 2025/6/22 10:30
+from time import perf_counter
+from typing import Any
+
+from flask import current_app
+from flask.signals import Namespace
+from flask.wrappers import Response as FlaskResponse
+
+_signals = Namespace()
+
+#: Sent with the time spent in each phase of a request handled by a view function, once the response is built.
+#: Receivers get the app as sender and ``timings``, a dict of phase name to seconds, in the order the phases ran:
+#: ``header``, ``cookie``, ``path``, ``query``, ``form``, ``body``, ``raw``, ``handler`` and ``validate_response``.
+#: Only the phases that ran are included, a request rejected by validation stops at the phase that failed.
+request_timed = _signals.signal("request-timed")
+
+
+def timing_enabled() -> bool:
+    """Whether the phases of the current request should be timed."""
+    return bool(request_timed.receivers) or getattr(current_app, "server_timing", False)
+
+
+def record_timing(timings: dict[str, float], name: str, start: float) -> float:
+    """Record the time spent in a phase since `start`, and return the start of the next phase."""
+    end = perf_counter()
+    timings[name] = end - start
+    return end
+
+
+def send_timings(timings: dict[str, float], rv: Any) -> FlaskResponse:
+    """
+    Send `request_timed`, and add the `Server-Timing` header if it is enabled.
+
+    Args:
+        timings: The time spent in each phase.
+        rv: The return value of a view function, converted with `make_response`.
+
+    Returns:
+        The response object.
+    """
+    app = current_app._get_current_object()  # type: ignore[attr-defined]
+    response = app.make_response(rv)
+    if request_timed.receivers:
+        request_timed.send(app, timings=timings)
+    if getattr(app, "server_timing", False):
+        response.headers.add(
+            "Server-Timing", ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.items())
+        )
+    return response
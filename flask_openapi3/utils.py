@@ -2,17 +2,24 @@
 # @Author  : llc
 # @Time    : 2021/5/1 21:34
 
+import hashlib
 import inspect
+import json
+import logging
 import re
 import sys
+from concurrent.futures import Executor
 from enum import Enum
+from functools import lru_cache
 from http import HTTPStatus
-from typing import Any, Callable, DefaultDict, Type, get_type_hints
+from typing import Any, Callable, DefaultDict, Iterable, Type, get_args, get_type_hints
 
 from flask import current_app, make_response
 from flask.wrappers import Response as FlaskResponse
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from pydantic.json_schema import JsonSchemaMode
+from pydantic_core import to_json
+from werkzeug.datastructures import Headers
 
 from .models import (
     OPENAPI3_REF_PREFIX,
@@ -28,12 +35,18 @@ from .models import (
     Response,
     Schema,
     Tag,
+    ValidationErrorModel,
 )
 from .models.data_type import DataType
 from .types import ParametersTuple, ResponseDict, ResponseStrKeyDict
 
+logger = logging.getLogger("flask_openapi3")
+
 HTTP_STATUS = {str(status.value): status.phrase for status in HTTPStatus}
 
+# Items sent to each worker at a time when generating the specification with a process pool
+SPEC_CHUNKSIZE = 64
+
 if sys.version_info < (3, 11):  # pragma: no cover
 
     class HTTPMethod(str, Enum):
@@ -123,17 +136,353 @@ def get_operation_id_for_path(*, bp_name: str = "", name: str = "", path: str =
 
 
 def get_model_schema(model: Type[BaseModel], mode: JsonSchemaMode = "validation") -> dict:
-    """Converts a Pydantic model to an OpenAPI schema."""
+    """
+    Converts a Pydantic model to an OpenAPI schema.
+
+    The schemas are cached process-wide, so a model shared by many routes is only converted once.
+    The returned dictionary is shared and read-only, `copy.deepcopy` gives a mutable copy.
+    """
 
     assert inspect.isclass(model) and issubclass(model, BaseModel), f"{model} is invalid `pydantic.BaseModel`"
 
-    model_config = model.model_config
-    by_alias = bool(model_config.get("by_alias", True))
+    key = _model_schema_key(model, mode)
+    schema = _model_schema_cache.get(key)
+    if schema is None:
+        schema = _model_schema_cache[key] = _freeze_schema(_generate_model_schema(key))
+
+    return schema
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("JSON schemas are shared and cannot be modified, use copy.deepcopy to get a mutable copy")
+
+
+class _FrozenDict(dict):
+    """A read-only dict of a shared JSON schema."""
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        # Copies are mutable
+        return dict, (dict(self),)
+
+
+class _FrozenList(list):
+    """A read-only list of a shared JSON schema."""
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def __reduce__(self):
+        # Copies are mutable
+        return list, (list(self),)
+
+
+def _freeze_schema(value: Any) -> Any:
+    """Make a JSON schema read-only, so that it can be shared."""
+    if isinstance(value, (_FrozenDict, _FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return _FrozenDict((k, _freeze_schema(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return _FrozenList(_freeze_schema(v) for v in value)
+    return value
+
+
+_model_schema_cache: dict[tuple, dict] = {}
+
+
+def _model_schema_key(model: Type[BaseModel], mode: JsonSchemaMode) -> tuple:
+    by_alias = bool(model.model_config.get("by_alias", True))
+    return model, mode, by_alias, OPENAPI3_REF_TEMPLATE
+
+
+def _generate_model_schema(key: tuple) -> dict:
+    model, mode, by_alias, ref_template = key
+    return model.model_json_schema(by_alias=by_alias, ref_template=ref_template, mode=mode)
+
+
+def prefetch_model_schemas(
+    models: Iterable[Type[BaseModel]], executor: Executor, mode: JsonSchemaMode = "validation"
+) -> None:
+    """
+    Generate the schemas of `get_model_schema` for many models concurrently.
+
+    Each schema is generated independently, so the results are the same as generating them one by one.
+    With a process pool, the models must be importable by the worker processes.
+    """
+    keys = [
+        key
+        for key in dict.fromkeys(_model_schema_key(model, mode) for model in models)
+        if key not in _model_schema_cache
+    ]
+    for key, schema in zip(keys, executor.map(_generate_model_schema, keys, chunksize=SPEC_CHUNKSIZE)):
+        _model_schema_cache.setdefault(key, _freeze_schema(schema))
+
 
-    return model.model_json_schema(by_alias=by_alias, ref_template=OPENAPI3_REF_TEMPLATE, mode=mode)
+def clear_model_schema_cache() -> None:
+    """Clear the cache of `get_model_schema`, e.g. after rebuilding a model with `model_rebuild`."""
+    _model_schema_cache.clear()
+    _interned_schemas.clear()
+    _schema_keys.clear()
+    _schemas_without_defs.clear()
+    _schema_modes.clear()
+    _model_schema_names.clear()
 
 
-def parse_header(header: Type[BaseModel]) -> tuple[list[Parameter], dict]:
+# Component schemas interned by content hash, so identical schemas are only stored once
+_interned_schemas: dict[str, tuple[Any, frozenset[str]]] = {}
+
+# The names, JSON schema modes and models the interned schemas were generated for, by content hash.
+# The model is the class itself, as distinct models may share a module and qualname, e.g. with `create_model`.
+_schema_modes: dict[str, set[tuple[str, str, type | None]]] = {}
+
+# The component schema names of a model and of the models it refers to, by model
+_model_schema_names: dict[type, dict[str, type]] = {}
+
+# Suffix of a component schema whose model has a different schema in the other mode, like pydantic names them
+_MODE_SUFFIXES = {"validation": "-Input", "serialization": "-Output"}
+
+# Content hash of the schemas interned so far, by id and plain_schemas, and the schemas to keep the ids valid
+_schema_keys: dict[tuple[int, bool], tuple[Any, str]] = {}
+
+
+def _iter_schema_refs(data: Any) -> Iterable[str]:
+    if isinstance(data, dict):
+        for value in data.values():
+            yield from _iter_schema_refs(value)
+    elif isinstance(data, list):
+        for value in data:
+            yield from _iter_schema_refs(value)
+    elif isinstance(data, str) and data.startswith(f"{OPENAPI3_REF_PREFIX}/"):
+        yield data[len(OPENAPI3_REF_PREFIX) + 1 :]
+
+
+def intern_schema(value: Any, plain_schemas: bool = False) -> tuple[Any, str]:
+    """
+    Convert a JSON schema to a `Schema` object, and return the one stored for identical content if any.
+
+    Args:
+        value: A JSON schema dict or a `Schema` object.
+        plain_schemas: Keep JSON schema dicts instead of converting them, made read-only as they are shared.
+
+    Returns:
+        The interned schema and the hash of its content.
+    """
+    memo = _schema_keys.get((id(value), plain_schemas))
+    if memo is not None and memo[0] is value:
+        return _interned_schemas[memo[1]][0], memo[1]
+
+    if isinstance(value, BaseModel):
+        schema = value
+        data = value.model_dump(mode="json", by_alias=True, exclude_unset=True, warnings=False)
+    elif plain_schemas:
+        schema = data = _freeze_schema(value)
+    else:
+        schema = Schema(**value)
+        data = schema.model_dump(mode="json", by_alias=True, exclude_unset=True, warnings=False)
+    key = hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+    if key not in _interned_schemas:
+        _interned_schemas[key] = (schema, frozenset(_iter_schema_refs(data)))
+    schema = _interned_schemas[key][0]
+    _schema_keys[(id(value), plain_schemas)] = (value, key)
+    _schema_keys[(id(schema), True)] = (schema, key)
+
+    return schema, key
+
+
+# Model schemas without their definitions, which are stored as component schemas of their own
+_schemas_without_defs: dict[int, tuple[dict, dict]] = {}
+
+
+def _without_defs(schema: dict) -> dict:
+    memo = _schemas_without_defs.get(id(schema))
+    if memo is None or memo[0] is not schema:
+        memo = _schemas_without_defs[id(schema)] = (
+            schema,
+            _FrozenDict((k, v) for k, v in schema.items() if k != "$defs"),
+        )
+    return memo[1]
+
+
+def rename_schema_refs(obj: Any, renames: dict[str, str]) -> Any:
+    """
+    Point the `$ref`s to renamed component schemas to their new names.
+
+    Objects are copied instead of changed in place, and only if they contain such a `$ref`.
+    """
+    if not renames:
+        return obj
+    if isinstance(obj, str):
+        if obj.startswith(f"{OPENAPI3_REF_PREFIX}/"):
+            name = obj[len(OPENAPI3_REF_PREFIX) + 1 :]
+            if name in renames:
+                return f"{OPENAPI3_REF_PREFIX}/{renames[name]}"
+        return obj
+    if isinstance(obj, BaseModel):
+        update = {}
+        for key, value in obj:
+            new_value = rename_schema_refs(value, renames)
+            if new_value is not value:
+                update[key] = new_value
+        return obj.model_copy(update=update) if update else obj
+    if isinstance(obj, dict):
+        new_dict = {key: rename_schema_refs(value, renames) for key, value in obj.items()}
+        return new_dict if any(new_dict[key] is not value for key, value in obj.items()) else obj
+    if isinstance(obj, list):
+        new_list = [rename_schema_refs(value, renames) for value in obj]
+        return new_list if any(new is not old for new, old in zip(new_list, obj)) else obj
+    return obj
+
+
+def _get_model_schema_names(model: Type[BaseModel]) -> dict[str, type]:
+    """Map the component schema names of a model and of the models in its fields to the models."""
+    names = _model_schema_names.get(model)
+    if names is None:
+        names = {normalize_name(model.model_config.get("title") or model.__name__): model}
+        seen: set[type] = set()
+        stack: list[Any] = [model]
+        while stack:
+            annotation = stack.pop()
+            if inspect.isclass(annotation) and issubclass(annotation, BaseModel):
+                if annotation in seen:
+                    continue
+                seen.add(annotation)
+                names.setdefault(normalize_name(annotation.__name__), annotation)
+                stack.extend(field.annotation for field in annotation.model_fields.values())
+                stack.extend(field.return_type for field in annotation.model_computed_fields.values())
+            else:
+                stack.extend(get_args(annotation))
+        _model_schema_names[model] = names
+    return names
+
+
+def _get_schema_modes(name: str, key: str) -> set[tuple[str, type | None]]:
+    """The JSON schema modes and models a schema was generated for under a name."""
+    return {(mode, model) for schema_name, mode, model in _schema_modes.get(key, ()) if schema_name == name}
+
+
+def _get_schema_mode(name: str, key: str, renames: dict[str, str]) -> str | None:
+    """The JSON schema mode of a schema, None if it is unknown."""
+    modes = {mode for mode, _ in _get_schema_modes(name, key)}
+    if len(modes) == 1:
+        return modes.pop()
+    if modes:
+        # The same schema in both modes, except for the schemas it refers to
+        for ref in _interned_schemas[key][1]:
+            for mode, suffix in _MODE_SUFFIXES.items():
+                if renames.get(ref) == f"{ref}{suffix}":
+                    return mode
+    return None
+
+
+def merge_components_schemas(
+    components_schemas: dict,
+    schemas: dict,
+    plain_schemas: bool = False,
+    mode: JsonSchemaMode | None = None,
+    models: Iterable[Type[BaseModel]] = (),
+) -> dict[str, str]:
+    """
+    Add component schemas to `components_schemas`, storing identical schemas only once.
+
+    A schema whose name is already used by a different schema is added under a unique name derived from its content,
+    as are the schemas referring to a renamed one. If the other schema is the one of the same model in the other
+    JSON schema mode, e.g. a model used both as a request body and as a response, the name gets a `-Input` or `-Output`
+    suffix instead. The `$ref`s in the added schemas are updated; other objects that refer to them must be updated
+    with `rename_schema_refs`.
+
+    Args:
+        components_schemas: The component schemas to add to.
+        schemas: The component schemas to add.
+        plain_schemas: Keep JSON schema dicts as they are instead of converting them to `Schema` objects.
+        mode: The JSON schema mode the schemas were generated with, None if they were merged before.
+        models: The models the schemas were generated from, along with `mode`.
+
+    Returns:
+        The renamed schemas, by their original name.
+    """
+    interned = {name: intern_schema(value, plain_schemas) for name, value in schemas.items()}
+    schema_models: dict[str, type] = {}
+    for model in models:
+        schema_models.update(_get_model_schema_names(model))
+    if mode is not None:
+        for name, (_, key) in interned.items():
+            _schema_modes.setdefault(key, set()).add((name, mode, schema_models.get(name)))
+
+    def get_schema_mode(name: str, key: str) -> tuple[str | None, set[type | None]]:
+        """The mode of a schema and the models it may come from."""
+        if mode is not None:
+            return mode, {schema_models.get(name)}
+        schema_mode = _get_schema_mode(name, key, renames)
+        return schema_mode, {model for m, model in _get_schema_modes(name, key) if m == schema_mode}
+
+    def content_key(schema: Any, key: str, renames: dict[str, str]) -> tuple[Any, str]:
+        if _interned_schemas[key][1].isdisjoint(renames):
+            return schema, key
+        return intern_schema(rename_schema_refs(schema, renames), True)
+
+    renames: dict[str, str] = {}
+    conflicts = True
+    while conflicts:
+        conflicts = False
+        for name, (schema, key) in interned.items():
+            if name in renames or name not in components_schemas:
+                continue
+            _, new_key = content_key(schema, key, renames)
+            existing_key = intern_schema(components_schemas[name], True)[1]
+            if existing_key == new_key:
+                continue
+            conflicts = True
+            schema_mode, schema_model = get_schema_mode(name, key)
+            other_models = {model for m, model in _get_schema_modes(name, existing_key) if m != schema_mode}
+            if schema_mode is not None and (schema_model & other_models) - {None}:
+                # The same model in the other mode
+                candidate = f"{name}{_MODE_SUFFIXES[schema_mode]}"
+                if (
+                    candidate not in components_schemas
+                    or intern_schema(components_schemas[candidate], True)[1] == new_key
+                ):
+                    renames[name] = candidate
+                    continue
+            # Stable as long as the content is the same
+            new_name = candidate = f"{name}_{key[:8]}"
+            n = 1
+            while candidate in components_schemas and intern_schema(components_schemas[candidate], True)[1] != new_key:
+                n += 1
+                candidate = f"{new_name}_{n}"
+            logger.warning("Component schema %r is already used by a different schema, renamed to %r", name, candidate)
+            renames[name] = candidate
+
+    for name, (schema, key) in interned.items():
+        schema, new_key = content_key(schema, key, renames)
+        components_schemas[renames.get(name, name)] = schema
+        if new_key != key:
+            # The schema referring to renamed ones is only the one of the mode they were renamed for
+            schema_mode, schema_model = get_schema_mode(name, key)
+            if schema_mode is None:
+                schema_modes = _get_schema_modes(name, key)
+            else:
+                schema_modes = {(schema_mode, model) for model in schema_model}
+            _schema_modes.setdefault(new_key, set()).update((name, m, model) for m, model in schema_modes)
+
+    return renames
+
+
+def get_response_models(responses: ResponseDict | ResponseStrKeyDict | None) -> list[Type[BaseModel]]:
+    """The models in `responses`, whose schemas are generated by `get_responses`."""
+    return [
+        response
+        for response in (responses or {}).values()
+        if inspect.isclass(response) and issubclass(response, BaseModel)
+    ]
+
+
+def parse_header(header: Type[BaseModel], plain_schemas: bool = False) -> tuple[list[Parameter], dict]:
     """Parses a header model and returns a list of parameters and component schemas."""
     schema = get_model_schema(header)
     parameters = []
@@ -145,7 +494,7 @@ def parse_header(header: Type[BaseModel]) -> tuple[list[Parameter], dict]:
             "name": name,
             "in": ParameterInType.HEADER,
             "required": name in schema.get("required", []),
-            "schema": Schema(**value),
+            "schema": value if plain_schemas else Schema(**value),
         }
         # Parse extra values
         if "description" in value.keys():
@@ -156,17 +505,17 @@ def parse_header(header: Type[BaseModel]) -> tuple[list[Parameter], dict]:
             data["example"] = value.get("example")
         if "examples" in value.keys():
             data["examples"] = value.get("examples")
-        parameters.append(Parameter(**data))
+        parameters.append(Parameter.model_construct(**data) if plain_schemas else Parameter(**data))
 
     # Parse definitions
     definitions = schema.get("$defs", {})
     for name, value in definitions.items():
-        components_schemas[name] = Schema(**value)
+        components_schemas[name] = value
 
     return parameters, components_schemas
 
 
-def parse_cookie(cookie: Type[BaseModel]) -> tuple[list[Parameter], dict]:
+def parse_cookie(cookie: Type[BaseModel], plain_schemas: bool = False) -> tuple[list[Parameter], dict]:
     """Parses a cookie model and returns a list of parameters and component schemas."""
     schema = get_model_schema(cookie)
     parameters = []
@@ -178,7 +527,7 @@ def parse_cookie(cookie: Type[BaseModel]) -> tuple[list[Parameter], dict]:
             "name": name,
             "in": ParameterInType.COOKIE,
             "required": name in schema.get("required", []),
-            "schema": Schema(**value),
+            "schema": value if plain_schemas else Schema(**value),
         }
         # Parse extra values
         if "description" in value.keys():
@@ -189,17 +538,17 @@ def parse_cookie(cookie: Type[BaseModel]) -> tuple[list[Parameter], dict]:
             data["example"] = value.get("example")
         if "examples" in value.keys():
             data["examples"] = value.get("examples")
-        parameters.append(Parameter(**data))
+        parameters.append(Parameter.model_construct(**data) if plain_schemas else Parameter(**data))
 
     # Parse definitions
     definitions = schema.get("$defs", {})
     for name, value in definitions.items():
-        components_schemas[name] = Schema(**value)
+        components_schemas[name] = value
 
     return parameters, components_schemas
 
 
-def parse_path(path: Type[BaseModel]) -> tuple[list[Parameter], dict]:
+def parse_path(path: Type[BaseModel], plain_schemas: bool = False) -> tuple[list[Parameter], dict]:
     """Parses a path model and returns a list of parameters and component schemas."""
     schema = get_model_schema(path)
     parameters = []
@@ -207,7 +556,12 @@ def parse_path(path: Type[BaseModel]) -> tuple[list[Parameter], dict]:
     properties = schema.get("properties", {})
 
     for name, value in properties.items():
-        data = {"name": name, "in": ParameterInType.PATH, "required": True, "schema": Schema(**value)}
+        data = {
+            "name": name,
+            "in": ParameterInType.PATH,
+            "required": True,
+            "schema": value if plain_schemas else Schema(**value),
+        }
         # Parse extra values
         if "description" in value.keys():
             data["description"] = value.get("description")
@@ -217,17 +571,17 @@ def parse_path(path: Type[BaseModel]) -> tuple[list[Parameter], dict]:
             data["example"] = value.get("example")
         if "examples" in value.keys():
             data["examples"] = value.get("examples")
-        parameters.append(Parameter(**data))
+        parameters.append(Parameter.model_construct(**data) if plain_schemas else Parameter(**data))
 
     # Parse definitions
     definitions = schema.get("$defs", {})
     for name, value in definitions.items():
-        components_schemas[name] = Schema(**value)
+        components_schemas[name] = value
 
     return parameters, components_schemas
 
 
-def parse_query(query: Type[BaseModel]) -> tuple[list[Parameter], dict]:
+def parse_query(query: Type[BaseModel], plain_schemas: bool = False) -> tuple[list[Parameter], dict]:
     """Parses a query model and returns a list of parameters and component schemas."""
     schema = get_model_schema(query)
     parameters = []
@@ -239,7 +593,7 @@ def parse_query(query: Type[BaseModel]) -> tuple[list[Parameter], dict]:
             "name": name,
             "in": ParameterInType.QUERY,
             "required": name in schema.get("required", []),
-            "schema": Schema(**value),
+            "schema": value if plain_schemas else Schema(**value),
         }
         # Parse extra values
         if "description" in value.keys():
@@ -250,19 +604,17 @@ def parse_query(query: Type[BaseModel]) -> tuple[list[Parameter], dict]:
             data["example"] = value.get("example")
         if "examples" in value.keys():
             data["examples"] = value.get("examples")
-        parameters.append(Parameter(**data))
+        parameters.append(Parameter.model_construct(**data) if plain_schemas else Parameter(**data))
 
     # Parse definitions
     definitions = schema.get("$defs", {})
     for name, value in definitions.items():
-        components_schemas[name] = Schema(**value)
+        components_schemas[name] = value
 
     return parameters, components_schemas
 
 
-def parse_form(
-    form: Type[BaseModel],
-) -> tuple[dict[str, MediaType], dict]:
+def parse_form(form: Type[BaseModel], plain_schemas: bool = False) -> tuple[dict[str, MediaType], dict]:
     """Parses a form model and returns a list of parameters and component schemas."""
     schema = get_model_schema(form)
     components_schemas = dict()
@@ -272,48 +624,49 @@ def parse_form(
 
     original_title = schema.get("title") or form.__name__
     title = normalize_name(original_title)
-    components_schemas[title] = Schema(**schema)
+    components_schemas[title] = _without_defs(schema) if plain_schemas else schema
     encoding = {}
     for k, v in properties.items():
         if v.get("type") == "array":
             encoding[k] = Encoding(style="form", explode=True)
-    content = {
-        "multipart/form-data": MediaType(
-            schema=Schema(**{"$ref": f"{OPENAPI3_REF_PREFIX}/{title}"}),
-        )
-    }
+    content = {"multipart/form-data": _make_ref_media_type(title, plain_schemas)}
     if encoding:
         content["multipart/form-data"].encoding = encoding
 
     # Parse definitions
     definitions = schema.get("$defs", {})
     for name, value in definitions.items():
-        components_schemas[name] = Schema(**value)
+        components_schemas[name] = value
 
     return content, components_schemas
 
 
-def parse_body(
-    body: Type[BaseModel],
-) -> tuple[dict[str, MediaType], dict]:
+def parse_body(body: Type[BaseModel], plain_schemas: bool = False) -> tuple[dict[str, MediaType], dict]:
     """Parses a body model and returns a list of parameters and component schemas."""
     schema = get_model_schema(body)
     components_schemas = dict()
 
     original_title = schema.get("title") or body.__name__
     title = normalize_name(original_title)
-    components_schemas[title] = Schema(**schema)
-    content = {"application/json": MediaType(schema=Schema(**{"$ref": f"{OPENAPI3_REF_PREFIX}/{title}"}))}
+    components_schemas[title] = _without_defs(schema) if plain_schemas else schema
+    content = {"application/json": _make_ref_media_type(title, plain_schemas)}
 
     # Parse definitions
     definitions = schema.get("$defs", {})
     for name, value in definitions.items():
-        components_schemas[name] = Schema(**value)
+        components_schemas[name] = value
 
     return content, components_schemas
 
 
-def get_responses(responses: ResponseStrKeyDict, components_schemas: dict, operation: Operation) -> None:
+def _make_ref_media_type(name: str, plain_schemas: bool) -> MediaType:
+    ref = {"$ref": f"{OPENAPI3_REF_PREFIX}/{name}"}
+    return MediaType.model_construct(schema=ref) if plain_schemas else MediaType(schema=Schema(**ref))
+
+
+def get_responses(
+    responses: ResponseStrKeyDict, components_schemas: dict, operation: Operation, plain_schemas: bool = False
+) -> None:
     _responses = {}
     _schemas = {}
 
@@ -331,7 +684,7 @@ def get_responses(responses: ResponseStrKeyDict, components_schemas: dict, opera
             name = normalize_name(original_title)
             _responses[key] = Response(
                 description=HTTP_STATUS.get(key, ""),
-                content={"application/json": MediaType(schema=Schema(**{"$ref": f"{OPENAPI3_REF_PREFIX}/{name}"}))},
+                content={"application/json": _make_ref_media_type(name, plain_schemas)},
             )
 
             model_config: DefaultDict[str, Any] = response.model_config  # type: ignore
@@ -354,15 +707,17 @@ def get_responses(responses: ResponseStrKeyDict, components_schemas: dict, opera
                     _content["application/json"].encoding = openapi_extra.get("encoding")  # type: ignore
                 _content.update(openapi_extra.get("content", {}))  # type: ignore
 
-            _schemas[name] = Schema(**schema)
+            _schemas[name] = _without_defs(schema) if plain_schemas else schema
             definitions = schema.get("$defs")
             if definitions:
                 # Add schema definitions to _schemas
                 for name, value in definitions.items():
-                    _schemas[normalize_name(name)] = Schema(**value)
+                    _schemas[normalize_name(name)] = value
 
-    components_schemas.update(**_schemas)
-    operation.responses = _responses
+    renames = merge_components_schemas(
+        components_schemas, _schemas, plain_schemas, mode="serialization", models=get_response_models(responses)
+    )
+    operation.responses = rename_schema_refs(_responses, renames)
 
 
 def parse_and_store_tags(
@@ -398,6 +753,7 @@ def parse_parameters(
     components_schemas: dict | None = None,
     operation: Operation | None = None,
     doc_ui: bool = True,
+    plain_schemas: bool = False,
 ) -> ParametersTuple:
     """
     Parses the parameters of a given function and returns the types for header, cookie, path,
@@ -408,6 +764,7 @@ def parse_parameters(
         components_schemas: Dictionary to store the parsed components schemas (default: None).
         operation: Operation object to populate with parsed parameters (default: None).
         doc_ui: Flag indicating whether to return types for documentation UI (default: True).
+        plain_schemas: Keep the JSON schemas of the models as dicts instead of `Schema` objects (default: False).
 
     Returns:
         tuple[Type[BaseModel], Type[BaseModel], Type[BaseModel], Type[BaseModel], Type[BaseModel], Type[BaseModel]]:
@@ -442,28 +799,39 @@ def parse_parameters(
     parameters = []
 
     if header:
-        _parameters, _components_schemas = parse_header(header)
-        parameters.extend(_parameters)
-        components_schemas.update(**_components_schemas)
+        _parameters, _components_schemas = parse_header(header, plain_schemas)
+        renames = merge_components_schemas(
+            components_schemas, _components_schemas, plain_schemas, mode="validation", models=(header,)
+        )
+        parameters.extend(rename_schema_refs(_parameters, renames))
 
     if cookie:
-        _parameters, _components_schemas = parse_cookie(cookie)
-        parameters.extend(_parameters)
-        components_schemas.update(**_components_schemas)
+        _parameters, _components_schemas = parse_cookie(cookie, plain_schemas)
+        renames = merge_components_schemas(
+            components_schemas, _components_schemas, plain_schemas, mode="validation", models=(cookie,)
+        )
+        parameters.extend(rename_schema_refs(_parameters, renames))
 
     if path:
-        _parameters, _components_schemas = parse_path(path)
-        parameters.extend(_parameters)
-        components_schemas.update(**_components_schemas)
+        _parameters, _components_schemas = parse_path(path, plain_schemas)
+        renames = merge_components_schemas(
+            components_schemas, _components_schemas, plain_schemas, mode="validation", models=(path,)
+        )
+        parameters.extend(rename_schema_refs(_parameters, renames))
 
     if query:
-        _parameters, _components_schemas = parse_query(query)
-        parameters.extend(_parameters)
-        components_schemas.update(**_components_schemas)
+        _parameters, _components_schemas = parse_query(query, plain_schemas)
+        renames = merge_components_schemas(
+            components_schemas, _components_schemas, plain_schemas, mode="validation", models=(query,)
+        )
+        parameters.extend(rename_schema_refs(_parameters, renames))
 
     if form:
-        _content, _components_schemas = parse_form(form)
-        components_schemas.update(**_components_schemas)
+        _content, _components_schemas = parse_form(form, plain_schemas)
+        renames = merge_components_schemas(
+            components_schemas, _components_schemas, plain_schemas, mode="validation", models=(form,)
+        )
+        _content = rename_schema_refs(_content, renames)
         request_body = RequestBody(content=_content, required=True)
         model_config: DefaultDict[str, Any] = form.model_config  # type: ignore
         openapi_extra = model_config.get("openapi_extra", {})
@@ -480,8 +848,11 @@ def parse_parameters(
         operation.requestBody = request_body
 
     if body:
-        _content, _components_schemas = parse_body(body)
-        components_schemas.update(**_components_schemas)
+        _content, _components_schemas = parse_body(body, plain_schemas)
+        renames = merge_components_schemas(
+            components_schemas, _components_schemas, plain_schemas, mode="validation", models=(body,)
+        )
+        _content = rename_schema_refs(_content, renames)
         request_body = RequestBody(content=_content, required=True)
         model_config: DefaultDict[str, Any] = body.model_config  # type: ignore
         openapi_extra = model_config.get("openapi_extra", {})
@@ -572,40 +943,206 @@ def make_validation_error_response(e: ValidationError) -> FlaskResponse:
     return response
 
 
-def run_validate_response(response: Any, responses: ResponseDict | None = None) -> Any:
-    """Validate response"""
+def _truncate_input(value: Any, max_length: int) -> Any:
+    if isinstance(value, (str, bytes)):
+        if len(value) <= max_length:
+            return value
+        value = value if isinstance(value, str) else value.decode("utf-8", "replace")
+        return value[:max_length] + "..."
+    if isinstance(value, (dict, list, tuple)):
+        # Echoed objects, e.g. the whole body of a missing field error
+        encoded = to_json(value, fallback=str)
+        if len(encoded) <= max_length:
+            return value
+        return encoded[:max_length].decode("utf-8", "ignore") + "..."
+    return value
+
+
+def make_validation_error_renderer(
+    max_errors: int | None = None,
+    max_input_length: int | None = None,
+    include_url: bool = False,
+    fail_fast: bool = False,
+) -> Callable[[ValidationError], FlaskResponse]:
+    """
+    Create a `validation_error_callback` that renders the errors of pydantic straight to JSON bytes.
+
+    The errors are rendered as they are for the default `ValidationErrorModel`. With another `validation_error_model`,
+    each error is validated with the model of the app and rendered from it, so the fields of the model have to be
+    keys of the errors of pydantic.
+
+    Args:
+        max_errors: Only report the first errors.
+        max_input_length: Truncate the `input` echoed by each error to this many characters.
+        include_url: Include the URL to the documentation of each error.
+        fail_fast: Only report the first error, the same as `max_errors=1`. All the errors of the failed part
+            of the request are still collected by pydantic, only the response is limited.
+
+    Returns:
+        A callback receiving the `ValidationError` and returning the Flask Response.
+    """
+    if fail_fast:
+        max_errors = 1
+
+    def render_validation_error(e: ValidationError) -> FlaskResponse:
+        errors: list[Any] = e.errors(include_url=include_url)
+        if max_errors is not None:
+            del errors[max_errors:]
+        if max_input_length is not None:
+            for error in errors:
+                if "input" in error:
+                    error["input"] = _truncate_input(error["input"], max_input_length)
+        validation_error_model = getattr(current_app, "validation_error_model", ValidationErrorModel)
+        if validation_error_model is not ValidationErrorModel:
+            errors = _get_list_type_adapter(validation_error_model).validate_python(errors)
+        return current_app.response_class(
+            to_json(errors, by_alias=True, fallback=str),
+            status=getattr(current_app, "validation_error_status", 422),
+            mimetype="application/json",
+        )
+
+    return render_validation_error
+
+
+class ResponseModels(dict):
+    """
+    The response models of a route, keyed by int status code.
+
+    It is built once when the route is registered: `HTTPStatus` and string keys are converted to int, ranges
+    such as "2XX" are expanded to the status codes they cover, and the "default" response is kept as the fallback.
+    Responses that are not pydantic models, such as `None` or a dict, can't be validated and are kept as `None`,
+    so that a range or the default response doesn't apply to them.
+    """
+
+    __slots__ = ("default",)
+
+    def __init__(self, responses: ResponseDict | None = None) -> None:
+        super().__init__()
+        self.default: Type[BaseModel] | None = None
+        ranges: dict[int, Type[BaseModel] | None] = {}
+        for key, value in (responses or {}).items():
+            model = value if inspect.isclass(value) and issubclass(value, BaseModel) else None
+            key = str(key.value if isinstance(key, HTTPStatus) else key).upper()
+            if key.isdigit():
+                self[int(key)] = model
+            elif key == "DEFAULT":
+                self.default = model
+            elif len(key) == 3 and key[0].isdigit() and key[1:] == "XX":
+                ranges[int(key[0])] = model
+        # Explicit status codes take precedence over ranges
+        for digit, model in ranges.items():
+            for status_code in range(digit * 100, digit * 100 + 100):
+                self.setdefault(status_code, model)
+
+    def get_model(self, status_code: int) -> Type[BaseModel] | None:
+        """Get the response model of a status code, or the default one."""
+        if status_code in self:
+            return self[status_code]
+        return self.default
+
+
+def _unpack_response(response: Any) -> tuple[Any, Any, Any]:
+    """Split the return value of a view function into the body, status and headers, like Flask does."""
+    status = headers = None
+    rv = response
+    if isinstance(response, tuple):
+        if len(response) == 3:
+            rv, status, headers = response
+        elif len(response) == 2:
+            if isinstance(response[1], (Headers, dict, tuple, list)):
+                rv, headers = response
+            else:
+                rv, status = response
+    return rv, status, headers
+
+
+def run_validate_response(response: Any, responses: ResponseDict | ResponseModels | None = None) -> Any:
+    """
+    Validate response.
+
+    The return value of the view function is validated before it is encoded, and replaced with the validated model,
+    so that the model is what gets encoded. A model instance of the response model is not validated again, and an
+    already encoded response is validated straight from its JSON body.
+    """
     if responses is None:
         return response
 
-    if isinstance(response, tuple):  # noqa
-        _resp, status_code = response[:2]
-    elif isinstance(response, FlaskResponse):
+    if not isinstance(responses, ResponseModels):
+        responses = ResponseModels(responses)
+
+    if isinstance(response, FlaskResponse):
         if response.mimetype != "application/json":
             # only application/json
             return response
-        _resp, status_code = response.json, response.status_code  # noqa
+        _resp, status_code = response.get_data(), response.status_code  # noqa
     else:
-        _resp, status_code = response, 200
+        _resp, status_code, _ = _unpack_response(response)
+        if status_code is None:
+            status_code = 200
+        elif isinstance(status_code, str):
+            status_code = int(status_code.split()[0])
 
-    # status_code is http.HTTPStatus
-    if isinstance(status_code, HTTPStatus):
-        status_code = status_code.value
-
-    resp_model = responses.get(status_code)
+    resp_model = responses.get_model(status_code)
 
     if resp_model is None:
         return response
 
-    assert inspect.isclass(resp_model) and issubclass(resp_model, BaseModel), (
-        f"{resp_model} is invalid `pydantic.BaseModel`"
-    )
+    if isinstance(_resp, resp_model):
+        return response
 
-    if isinstance(_resp, str):
+    if isinstance(_resp, (str, bytes)):
+        # Already encoded
         resp_model.model_validate_json(_resp)
+        return response
+
+    model = resp_model.model_validate(_resp)
+
+    if isinstance(response, tuple):
+        return model, *response[1:]
+    return model
+
+
+def log_response_validation_error(e: ValidationError, endpoint: str | None) -> None:
+    """Log a response that does not match its declared model, used when `validate_response_mode` is not "raise"."""
+    logger.warning("Response validation failed for endpoint %r: %s", endpoint, e)
+
+
+@lru_cache(maxsize=None)
+def _get_list_type_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])  # type: ignore
+
+
+def make_model_response(response: Any) -> Any:
+    """
+    Serialize a pydantic model, or a list of them, returned by a view function straight to JSON bytes.
+
+    The view function may also return a tuple of the model with a status code and/or headers,
+    like any Flask view function. Other return values are returned as-is.
+
+    Args:
+        response: The return value of the view function.
+
+    Returns:
+        A Flask Response if the return value contains pydantic models, otherwise the return value.
+    """
+    rv, status, headers = _unpack_response(response)
+
+    data: str | bytes
+    if isinstance(rv, BaseModel):
+        by_alias = bool(rv.model_config.get("by_alias", True))
+        data = rv.model_dump_json(by_alias=by_alias)
+    elif isinstance(rv, list) and rv and isinstance(rv[0], BaseModel):
+        model = type(rv[0])
+        by_alias = bool(model.model_config.get("by_alias", True))
+        if all(type(item) is model for item in rv):
+            data = _get_list_type_adapter(model).dump_json(rv, by_alias=by_alias)
+        else:
+            # Serialize each item by its own type, a list[model] adapter drops the fields of subclasses
+            data = to_json(rv, by_alias=by_alias)
     else:
-        resp_model.model_validate(_resp)
+        return response
 
-    return response
+    return current_app.response_class(data, status=status, headers=headers, mimetype="application/json")
 
 
 def parse_rule(rule: str, url_prefix=None) -> str:
@@ -2,7 +2,9 @@
 # @Author  : llc
 # @Time    : 2022/10/14 16:09
 import typing
-from typing import Any, Callable
+from typing import Any, Callable, Type
+
+from pydantic import BaseModel
 
 from .models import ExternalDocumentation, Server, Tag
 from .types import ResponseDict
@@ -11,6 +13,7 @@ from .utils import (
     convert_responses_key_to_string,
     get_operation,
     get_operation_id_for_path,
+    get_response_models,
     get_responses,
     parse_and_store_tags,
     parse_method,
@@ -31,7 +34,10 @@ class APIView:
         view_responses: ResponseDict | None = None,
         doc_ui: bool = True,
         operation_id_callback: Callable = get_operation_id_for_path,
-        validate_response: bool | None = None,
+        validate_response: bool | float | None = None,
+        reuse_view_object: bool = False,
+        lazy_spec: bool = False,
+        plain_schemas: bool = False,
     ):
         """
         Create a class-based view
@@ -45,7 +51,13 @@ class APIView:
             operation_id_callback: Callback function for custom operation_id generation.
                                    Receives name (str), path (str) and method (str) parameters.
                                    Defaults to `get_operation_id_for_path` from utils
-            validate_response: Verify the response body.
+            validate_response: Verify the response body, or only a sampled fraction of them if it is a float.
+            reuse_view_object: Reuse one view class instance per thread instead of creating one per request.
+                               Only enable it for views that keep no per-request state on `self`.
+            lazy_spec: Only record the views when they are declared, and build their OpenAPI operations and schemas
+                       when the specification is first accessed. Defaults to False.
+            plain_schemas: Keep the JSON schemas generated by pydantic as plain dicts in the specification.
+                           Defaults to False.
         """
         self.url_prefix = url_prefix
         self.view_tags = view_tags or []
@@ -65,6 +77,22 @@ class APIView:
 
         self.validate_response = validate_response
 
+        self.reuse_view_object = reuse_view_object
+
+        # Defer collecting the OpenAPI info until the specification is accessed
+        self.lazy_spec = lazy_spec
+        self._lazy_spec_collectors: list[Callable] = []
+        self._lazy_spec_models: list[Type[BaseModel]] = []
+
+        # Keep the JSON schemas of the models as plain dicts
+        self.plain_schemas = plain_schemas
+
+    def _load_lazy_spec(self) -> None:
+        """Collect the OpenAPI info recorded in `lazy_spec` mode."""
+        collectors, self._lazy_spec_collectors = self._lazy_spec_collectors, []
+        for collector in collectors:
+            collector()
+
     def route(self, rule: str):
         """Decorator for view class"""
 
@@ -81,17 +109,26 @@ class APIView:
                 if not cls_method:
                     continue
                 methods.append(method)
-                if self.doc_ui is False:
-                    continue
-                if not getattr(cls_method, "operation", None):
-                    continue
-                # Parse method
-                parse_method(uri, method, self.paths, cls_method.operation)
-                # Update operation_id
-                if not cls_method.operation.operationId:
-                    cls_method.operation.operationId = self.operation_id_callback(
-                        name=cls_method.__qualname__, path=rule, method=method
-                    )
+
+            def collect_operations():
+                for method in methods:
+                    cls_method = getattr(cls, method.lower())
+                    if not getattr(cls_method, "operation", None):
+                        continue
+                    # Parse method
+                    parse_method(uri, method, self.paths, cls_method.operation)
+                    # Update operation_id
+                    if not cls_method.operation.operationId:
+                        cls_method.operation.operationId = self.operation_id_callback(
+                            name=cls_method.__qualname__, path=rule, method=method
+                        )
+
+            if self.doc_ui is False:
+                pass
+            elif self.lazy_spec:
+                self._lazy_spec_collectors.append(collect_operations)
+            else:
+                collect_operations()
 
             # Convert route parameters from {param} to <param>
             _rule = uri.replace("{", "<").replace("}", ">")
@@ -114,7 +151,7 @@ class APIView:
         security: list[dict[str, list[Any]]] | None = None,
         servers: list[Server] | None = None,
         openapi_extensions: dict[str, Any] | None = None,
-        validate_response: bool | None = None,
+        validate_response: bool | float | None = None,
         doc_ui: bool = True,
     ) -> Callable:
         """
@@ -133,7 +170,7 @@ class APIView:
             servers: An alternative server array to service this operation.
             openapi_extensions: Allows extensions to the OpenAPI Schema.
             doc_ui: Declares this operation to be shown. Default to True.
-            validate_response: Verify the response body.
+            validate_response: Verify the response body, or only a sampled fraction of them if it is a float.
         """
 
         new_responses = convert_responses_key_to_string(responses or {})
@@ -147,44 +184,57 @@ class APIView:
             if self.doc_ui is False or doc_ui is False:
                 return func
 
-            # Global response combines API responses
-            combine_responses = {**self.view_responses, **new_responses}
+            def collect_operation():
+                # Global response combines API responses
+                combine_responses = {**self.view_responses, **new_responses}
+
+                # Create operation
+                operation = get_operation(
+                    func, summary=summary, description=description, openapi_extensions=openapi_extensions
+                )
 
-            # Create operation
-            operation = get_operation(
-                func, summary=summary, description=description, openapi_extensions=openapi_extensions
-            )
+                # Set external docs
+                if external_docs:
+                    operation.externalDocs = external_docs
 
-            # Set external docs
-            if external_docs:
-                operation.externalDocs = external_docs
+                # Unique string used to identify the operation.
+                if operation_id:
+                    operation.operationId = operation_id
 
-            # Unique string used to identify the operation.
-            if operation_id:
-                operation.operationId = operation_id
+                # Only set `deprecated` if True, otherwise leave it as None
+                if deprecated is not None:
+                    operation.deprecated = deprecated
 
-            # Only set `deprecated` if True, otherwise leave it as None
-            if deprecated is not None:
-                operation.deprecated = deprecated
+                # Add security
+                _security = (security or []) + self.view_security or None
+                if _security:
+                    operation.security = _security
 
-            # Add security
-            _security = (security or []) + self.view_security or None
-            if _security:
-                operation.security = _security
+                # Add servers
+                if servers:
+                    operation.servers = servers
 
-            # Add servers
-            if servers:
-                operation.servers = servers
+                # Store tags
+                parse_and_store_tags(tags, self.tags, self.tag_names, operation)
 
-            # Store tags
-            parse_and_store_tags(tags, self.tags, self.tag_names, operation)
+                # Parse parameters
+                parse_parameters(
+                    func,
+                    components_schemas=self.components_schemas,
+                    operation=operation,
+                    plain_schemas=self.plain_schemas,
+                )
 
-            # Parse parameters
-            parse_parameters(func, components_schemas=self.components_schemas, operation=operation)
+                # Parse response
+                get_responses(combine_responses, self.components_schemas, operation, self.plain_schemas)
+                func.operation = operation
 
-            # Parse response
-            get_responses(combine_responses, self.components_schemas, operation)
-            func.operation = operation
+            if self.lazy_spec:
+                # Only record the view, it is collected the first time the specification is accessed
+                self._lazy_spec_collectors.append(collect_operation)
+                self._lazy_spec_models.extend(get_response_models({**self.view_responses, **new_responses}))
+            else:
+                collect_operation()
 
             return func
 
@@ -204,7 +254,9 @@ class APIView:
         for rule, (cls, methods) in self.views.items():
             for method in methods:
                 func = getattr(cls, method.lower())
-                _validate_response = getattr(func, "validate_response", None) or self.validate_response
+                _validate_response = getattr(func, "validate_response", None)
+                if _validate_response is None:
+                    _validate_response = self.validate_response
                 header, cookie, path, query, form, body, raw = parse_parameters(func, doc_ui=False)
                 view_func = app.create_view_func(
                     func,
@@ -219,6 +271,7 @@ class APIView:
                     view_kwargs=view_kwargs,
                     responses=func.responses,
                     validate_response=_validate_response,
+                    reuse_view_object=self.reuse_view_object,
                 )
 
                 if url_prefix and self.url_prefix and url_prefix != self.url_prefix:
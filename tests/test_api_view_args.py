@@ -38,7 +38,24 @@ class BookAPIView:
         return {"b": self.b}
 
 
+reuse_api_view = APIView(url_prefix="/api/v2", reuse_view_object=True)
+
+
+@reuse_api_view.route("/book")
+class ReusedBookListAPIView:
+    instances = 0
+
+    def __init__(self, view_kwargs=None):
+        ReusedBookListAPIView.instances += 1
+        self.a = view_kwargs.get("a")
+
+    @reuse_api_view.doc(summary="get book list")
+    def get(self):
+        return {"a": self.a, "instances": ReusedBookListAPIView.instances}
+
+
 app.register_api_view(api_view, view_kwargs={"a": 1, "b": 2})
+app.register_api_view(reuse_api_view, view_kwargs={"a": 1})
 
 
 @pytest.fixture
@@ -60,3 +77,10 @@ def test_get_view_kwargs(client):
     assert resp.status_code == 200
 
     assert resp.json["b"] == 2
+
+
+def test_reuse_view_object(client):
+    for _ in range(3):
+        resp = client.get("/api/v2/book")
+        assert resp.status_code == 200
+        assert resp.json == {"a": 1, "instances": 1}
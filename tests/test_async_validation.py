@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# @Author  : llc
+# @Time    : 2025/6/28 15:20
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pydantic import BaseModel, field_validator
+
+from flask_openapi3 import OpenAPI, validate_request
+
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="validation")
+app = OpenAPI(__name__, async_validation_threshold=64, async_validation_executor=executor)
+app.config["TESTING"] = True
+
+
+class BookBody(BaseModel):
+    name: str
+    thread: str = ""
+
+    @field_validator("thread")
+    @classmethod
+    def validate_thread(cls, value):
+        return threading.current_thread().name
+
+
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    return client
+
+
+@app.post("/book")
+async def create_book(body: BookBody):
+    return {"thread": body.thread}
+
+
+@app.post("/book-delay")
+@validate_request()
+async def create_book_delay(body: BookBody):
+    return {"thread": body.thread}
+
+
+@app.post("/book-sync")
+def create_book_sync(body: BookBody):
+    return {"thread": body.thread}
+
+
+@pytest.mark.parametrize("url", ["/book", "/book-delay"])
+def test_async_validation(client, url):
+    resp = client.post(url, json={"name": "S", "thread": ""})
+    assert resp.status_code == 200
+    assert not resp.json["thread"].startswith("validation")
+
+    resp = client.post(url, json={"name": "S" * 64, "thread": ""})
+    assert resp.status_code == 200
+    assert resp.json["thread"].startswith("validation")
+
+    resp = client.post(url, json={"name": 1, "thread": "." * 64})
+    assert resp.status_code == 422
+
+
+def test_sync_view_validates_inline(client):
+    resp = client.post("/book-sync", json={"name": "S" * 64, "thread": ""})
+    assert resp.status_code == 200
+    assert not resp.json["thread"].startswith("validation")
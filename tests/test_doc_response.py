@@ -0,0 +1,66 @@
+import gzip
+import json
+
+import pytest
+from pydantic import BaseModel
+
+from flask_openapi3 import OpenAPI
+
+app = OpenAPI(__name__)
+app.config["TESTING"] = True
+
+
+class BookQuery(BaseModel):
+    age: int
+
+
+@app.get("/book")
+def get_book(query: BookQuery):
+    return {"age": query.age}  # pragma: no cover
+
+
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    return client
+
+
+def test_identity(client):
+    resp = client.get("/openapi/openapi.json", headers={"Accept-Encoding": "identity"})
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/json"
+    assert "Content-Encoding" not in resp.headers
+    assert resp.headers["Cache-Control"] == "no-cache"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert resp.json == app.api_doc
+
+
+def test_gzip(client):
+    resp = client.get("/openapi/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(resp.get_data())) == app.api_doc
+
+
+def test_not_modified(client):
+    resp = client.get("/openapi/openapi.json", headers={"Accept-Encoding": "gzip"})
+    etag = resp.headers["ETag"]
+
+    resp = client.get("/openapi/openapi.json", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.get_data() == b""
+    assert resp.headers["ETag"] == etag
+
+    # The identity encoding is a different representation
+    resp = client.get("/openapi/openapi.json", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+
+
+def test_cache_control(client):
+    app.config["OPENAPI_DOC_CACHE_CONTROL"] = "public, max-age=60"
+    try:
+        resp = client.get("/openapi/openapi.json")
+        assert resp.headers["Cache-Control"] == "public, max-age=60"
+    finally:
+        app.config.pop("OPENAPI_DOC_CACHE_CONTROL")
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# @Author  : llc
+# @Time    : 2025/7/1 10:05
+import pytest
+from pydantic import BaseModel
+
+from flask_openapi3 import OpenAPI
+from flask_openapi3.signals import request_timed
+
+
+class BookPath(BaseModel):
+    bid: int
+
+
+class BookHeader(BaseModel):
+    api_key: str
+
+
+class BookQuery(BaseModel):
+    age: int
+
+
+class BookBody(BaseModel):
+    name: str
+
+
+def create_app(fail_fast_validation: bool) -> OpenAPI:
+    app = OpenAPI(__name__, fail_fast_validation=fail_fast_validation)
+    app.config["TESTING"] = True
+
+    @app.put("/book/<bid>")
+    def update_book(path: BookPath, header: BookHeader, query: BookQuery, body: BookBody):
+        return {"bid": path.bid, "api_key": header.api_key, "age": query.age, "name": body.name}
+
+    return app
+
+
+@pytest.fixture
+def timings():
+    received = []
+
+    def receiver(sender, timings):
+        received.append(list(timings))
+
+    with request_timed.connected_to(receiver):
+        yield received
+
+
+@pytest.mark.parametrize(
+    "fail_fast_validation, phases",
+    [(False, ["header", "path", "query", "body", "handler"]), (True, ["path", "header", "query", "body", "handler"])],
+)
+def test_phase_order(timings, fail_fast_validation, phases):
+    client = create_app(fail_fast_validation).test_client()
+    resp = client.put("/book/1?age=2", json={"name": "S"}, headers={"api_key": "k"})
+    assert resp.json == {"bid": 1, "api_key": "k", "age": 2, "name": "S"}
+    assert timings == [phases]
+
+
+def test_fail_fast_stops_before_body(timings, monkeypatch):
+    client = create_app(True).test_client()
+
+    def get_data(*args, **kwargs):
+        raise AssertionError("the body should not be read")  # pragma: no cover
+
+    monkeypatch.setattr("flask.wrappers.Request.get_data", get_data)
+    resp = client.put("/book/a?age=2", json={"name": "S"})
+    assert resp.status_code == 422
+    assert resp.json[0]["loc"] == ["bid"]
+    assert timings == [["path"]]
@@ -2,7 +2,7 @@
 # @Author  : llc
 # @Time    : 2023/8/6 13:47
 from enum import Enum
-from typing import Any
+from typing import Any, Literal
 
 import pytest
 from pydantic import BaseModel
@@ -77,6 +77,44 @@ class FormParameter(BaseModel):
     )
 
 
+class ScalarForm(BaseModel):
+    string: str
+    string_list: list[str]
+    digit: int | None = None
+
+
+class OptionalListForm(BaseModel):
+    tags: list[str] | None = None
+    file: FileStorage | None = None
+    files: list[FileStorage] | None = None
+
+
+@app.post("/optional-list")
+def optional_list_form_example(form: OptionalListForm):
+    return {
+        "tags": form.tags,
+        "file": form.file and form.file.filename,
+        "files": form.files and [file.filename for file in form.files],
+    }
+
+
+class LiteralForm(BaseModel):
+    level: Literal[1, 2]
+    levels: list[Literal[1, 2]] = []
+    flag: Literal[True] | None = None
+    file_type: FileType | None = None
+
+
+@app.post("/literal")
+def literal_form_example(form: LiteralForm):
+    return form.model_dump()
+
+
+@app.post("/scalar")
+def scalar_form_example(form: ScalarForm):
+    return form.model_dump()
+
+
 @app.post("/example")
 def complex_form_example(form: FormParameters):
     print(form.model_dump())
@@ -128,3 +166,43 @@ def test_invalid_json_in_form_example(client):
 
     resp = client.post("/example2", data=data, content_type="multipart/form-data")
     assert resp.status_code == 200
+
+
+def test_scalar_form_is_not_json_decoded(client):
+    data = {"string": "123", "string_list": ["true", '{"a": 1}'], "digit": "7"}
+    resp = client.post("/scalar", data=data, content_type="multipart/form-data")
+    assert resp.status_code == 200
+    assert resp.json == {"string": "123", "string_list": ["true", '{"a": 1}'], "digit": 7}
+
+
+def test_optional_list_form_is_json_decoded(client):
+    data = {"tags": '["a", "b"]'}
+    resp = client.post("/optional-list", data=data, content_type="multipart/form-data")
+    assert resp.status_code == 200
+    assert resp.json == {"tags": ["a", "b"], "file": None, "files": None}
+
+    resp = client.post("/optional-list", data={}, content_type="multipart/form-data")
+    assert resp.json == {"tags": None, "file": None, "files": None}
+
+
+def test_optional_file_form(client):
+    from io import BytesIO
+
+    data = {
+        "file": (BytesIO(b"a"), "a.txt"),
+        "files": [(BytesIO(b"b"), "b.txt"), (BytesIO(b"c"), "c.txt")],
+    }
+    resp = client.post("/optional-list", data=data, content_type="multipart/form-data")
+    assert resp.status_code == 200
+    assert resp.json == {"tags": None, "file": "a.txt", "files": ["b.txt", "c.txt"]}
+
+
+def test_literal_form_is_json_decoded(client):
+    data = {"level": "2", "levels": ["1", "2"], "flag": "true", "file_type": "1"}
+    resp = client.post("/literal", data=data, content_type="multipart/form-data")
+    assert resp.status_code == 200
+    assert resp.json == {"level": 2, "levels": [1, 2], "flag": True, "file_type": 1}
+
+    resp = client.post("/literal", data={"level": "3"}, content_type="multipart/form-data")
+    assert resp.status_code == 422
+    assert resp.json[0]["type"] == "literal_error"
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# @Author  : llc
+# @Time    : 2025/6/25 9:40
+from io import BytesIO
+
+import pytest
+from flask import request
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+from flask_openapi3 import FileStorage, OpenAPI
+
+app = OpenAPI(__name__)
+app.config["TESTING"] = True
+
+
+class UploadForm(BaseModel):
+    file: FileStorage = Field(..., json_schema_extra={"maxLength": 1024 * 1024})
+    files: list[FileStorage] = []
+    file_type: str = Field(..., max_length=8)
+    age: int = 0
+    tags: list[str] = []
+
+    model_config = ConfigDict(stream_form=True)
+
+
+@app.post("/upload")
+def upload(form: UploadForm):
+    return {
+        "file": form.file.read().decode(),
+        "files": [file.filename for file in form.files],
+        "file_type": form.file_type,
+        "age": form.age,
+        "tags": form.tags,
+        "request_form": request.form.to_dict(flat=False),
+    }
+
+
+class SizeForm(BaseModel):
+    width: int
+    height: int = 0
+
+    model_config = ConfigDict(stream_form=True)
+
+    @field_validator("width", mode="before")
+    @classmethod
+    def strip_px(cls, value):
+        return value.removesuffix("px") if isinstance(value, str) else value
+
+
+@app.post("/size")
+def size(form: SizeForm):
+    return form.model_dump()
+
+
+class DefaultsForm(BaseModel):
+    height: int
+
+    model_config = ConfigDict(stream_form=True)
+
+    @model_validator(mode="before")
+    @classmethod
+    def default_height(cls, data):
+        return {"height": "1", **{key: value for key, value in data.items() if value != "auto"}}
+
+
+@app.post("/defaults")
+def defaults(form: DefaultsForm):
+    return form.model_dump()
+
+
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    return client
+
+
+def make_body(parts: list[tuple[str, str | None, bytes]]) -> bytes:
+    body = b""
+    for name, filename, content in parts:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+        body += f"--boundary\r\nContent-Disposition: {disposition}\r\n\r\n".encode() + content + b"\r\n"
+    return body + b"--boundary--\r\n"
+
+
+def test_stream_form(client):
+    data = {
+        "file_type": "txt",
+        "age": "3",
+        "tags": ["a", "b"],
+        "file": (BytesIO(b"content"), "a.txt"),
+        "files": [(BytesIO(b"1"), "b.txt"), (BytesIO(b"2"), "c.txt")],
+    }
+    resp = client.post("/upload", data=data, content_type="multipart/form-data")
+    assert resp.status_code == 200
+    assert resp.json == {
+        "file": "content",
+        "files": ["b.txt", "c.txt"],
+        "file_type": "txt",
+        "age": 3,
+        "tags": ["a", "b"],
+        "request_form": {"file_type": ["txt"], "age": ["3"], "tags": ["a", "b"]},
+    }
+
+
+def test_stream_form_rejects_early(client):
+    body = make_body([("file_type", None, b"too long for the model"), ("file", "a.txt", b"x" * 1024 * 512)])
+    stream = BytesIO(body)
+    resp = client.post(
+        "/upload",
+        input_stream=stream,
+        content_length=len(body),
+        content_type="multipart/form-data; boundary=boundary",
+    )
+    assert resp.status_code == 422
+    assert resp.json[0]["loc"] == ["file_type"]
+    assert resp.json[0]["type"] == "string_too_long"
+    # The file was never read
+    assert stream.tell() < len(body)
+
+
+def test_stream_form_file_too_large(client):
+    body = make_body([("file_type", None, b"txt"), ("file", "a.txt", b"x" * (1024 * 1024 + 1))])
+    resp = client.post("/upload", data=body, content_type="multipart/form-data; boundary=boundary")
+    assert resp.status_code == 422
+    assert resp.json[0]["loc"] == ["file"]
+    assert resp.json[0]["type"] == "file_too_large"
+    assert resp.json[0]["ctx"] == {"max_size": 1024 * 1024}
+
+
+def test_stream_form_malformed(client):
+    resp = client.post("/upload", data=b"--boundary\r\nbroken", content_type="multipart/form-data; boundary=boundary")
+    assert resp.status_code == 422
+
+
+def test_stream_form_not_multipart(client):
+    resp = client.post("/upload", data={"file_type": "txt"}, content_type="application/x-www-form-urlencoded")
+    assert resp.status_code == 422
+    assert [error["loc"] for error in resp.json] == [["file"]]
+
+
+def test_stream_form_field_validators(client):
+    body = make_body([("width", None, b"10px"), ("height", None, b"20")])
+    resp = client.post("/size", data=body, content_type="multipart/form-data; boundary=boundary")
+    assert resp.status_code == 200
+    assert resp.json == {"width": 10, "height": 20}
+
+    # Fields without validators are still validated as they arrive
+    body = make_body([("width", None, b"10px"), ("height", None, b"20px")])
+    resp = client.post("/size", data=body, content_type="multipart/form-data; boundary=boundary")
+    assert resp.status_code == 422
+    assert resp.json[0]["loc"] == ["height"]
+
+    body = make_body([("height", None, b"auto")])
+    resp = client.post("/defaults", data=body, content_type="multipart/form-data; boundary=boundary")
+    assert resp.status_code == 200
+    assert resp.json == {"height": 1}
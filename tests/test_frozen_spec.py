@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# @Author  : llc
+# @Time    : 2025/7/3 15:08
+import json
+
+import pytest
+from pydantic import BaseModel
+
+from flask_openapi3 import APIBlueprint, APIView, OpenAPI
+from flask_openapi3.commands import openapi_command
+
+
+class BookQuery(BaseModel):
+    age: int
+
+
+class BookPath(BaseModel):
+    bid: int
+
+
+class BookResponse(BaseModel):
+    name: str
+    age: int
+
+
+def create_app(frozen_spec=None) -> OpenAPI:
+    app = OpenAPI(__name__, frozen_spec=frozen_spec)
+    app.config["TESTING"] = True
+
+    @app.get("/book", responses={200: BookResponse})
+    def get_book(query: BookQuery):
+        return {"name": "S", "age": query.age}
+
+    api = APIBlueprint("book", __name__, url_prefix="/api", lazy_spec=True)
+
+    @api.get("/book")
+    def get_api_book(query: BookQuery):
+        return {"age": query.age}
+
+    app.register_api(api)
+
+    view = APIView(url_prefix="/view", lazy_spec=True)
+
+    @view.route("/book/<int:bid>")
+    class BookAPIView:
+        @view.doc(summary="get book")
+        def get(self, path: BookPath):
+            return {"bid": path.bid}
+
+    app.register_api_view(view)
+
+    return app
+
+
+@pytest.fixture
+def frozen_spec(tmp_path):
+    output = tmp_path / "openapi.json"
+    result = create_app().test_cli_runner().invoke(openapi_command, ("--output", str(output)))
+    assert result.exit_code == 0
+    return output
+
+
+def test_frozen_spec(frozen_spec):
+    app = create_app(frozen_spec)
+    assert app.paths == {}
+    assert app.components_schemas == {}
+
+    resp = app.test_client().get("/openapi/openapi.json")
+    assert resp.status_code == 200
+    assert resp.data == frozen_spec.read_bytes()
+    assert set(resp.json["paths"]) == {"/book", "/api/book", "/view/book/{bid}"}
+    assert app.api_doc == json.loads(frozen_spec.read_bytes())
+
+
+def test_frozen_spec_request_validation(frozen_spec):
+    client = create_app(frozen_spec).test_client()
+    assert client.get("/book?age=3").json == {"name": "S", "age": 3}
+    assert client.get("/book?age=a").status_code == 422
+    assert client.get("/api/book?age=a").status_code == 422
+    assert client.get("/view/book/1").json == {"bid": 1}
+
+
+def test_frozen_spec_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        create_app(tmp_path / "openapi.json")
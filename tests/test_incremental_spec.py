@@ -0,0 +1,129 @@
+import threading
+import time
+
+from pydantic import BaseModel, create_model
+
+from flask_openapi3 import APIBlueprint, Info, OpenAPI
+
+
+class BookQuery(BaseModel):
+    age: int
+
+
+class BookBody(BaseModel):
+    name: str
+
+
+class BookResponse(BaseModel):
+    bid: int
+
+
+def create_app():
+    app = OpenAPI(__name__)
+
+    @app.get("/book", responses={200: BookResponse})
+    def get_book(query: BookQuery):
+        return {"bid": query.age}  # pragma: no cover
+
+    return app
+
+
+def add_routes(app):
+    @app.post("/book")
+    def create_book(body: BookBody):
+        return {}  # pragma: no cover
+
+    api = APIBlueprint("api", __name__, url_prefix="/api")
+
+    @api.get("/book")
+    def get_api_book(query: BookQuery):
+        return {}  # pragma: no cover
+
+    app.register_api(api)
+
+
+def test_late_routes():
+    app = create_app()
+    spec_json = app.api_doc
+    assert list(spec_json["paths"]) == ["/book"]
+
+    add_routes(app)
+
+    dumped = []
+    dump_path_item = app._dump_path_item
+
+    def counting_dump_path_item(path_item):
+        dumped.append(path_item)
+        return dump_path_item(path_item)
+
+    app._dump_path_item = counting_dump_path_item
+    spec_json = app.api_doc
+    assert list(spec_json["paths"]) == ["/book", "/api/book"]
+    assert "post" in spec_json["paths"]["/book"]
+    assert "BookBody" in spec_json["components"]["schemas"]
+    assert len(dumped) == 2
+
+    # Nothing changed since
+    assert app.api_doc is spec_json
+
+    # Same document as a full generation
+    full_app = create_app()
+    add_routes(full_app)
+    assert spec_json == full_app.api_doc
+
+
+def test_invalidate_spec():
+    app = create_app()
+    spec_json = app.api_doc
+    assert spec_json["info"]["title"] == "OpenAPI"
+
+    app.info = Info(title="book API", version="1.0.0")
+    assert app.api_doc is spec_json
+
+    app.invalidate_spec()
+    assert app.api_doc["info"]["title"] == "book API"
+
+    app.paths["/book"].get.summary = "new summary"
+    app.invalidate_spec(["/book"])
+    assert app.api_doc["paths"]["/book"]["get"]["summary"] == "new summary"
+
+
+def test_concurrent_first_requests():
+    app = OpenAPI(__name__)
+    for i in range(50):
+        query_model = create_model(f"BookQuery{i}", age=(int, ...))
+
+        def get_book(query):
+            return {}  # pragma: no cover
+
+        get_book.__annotations__ = {"query": query_model}
+        app.get(f"/book{i}", responses={200: BookResponse}, endpoint=f"get_book{i}")(get_book)
+
+    dumped = []
+    dump_path_item = app._dump_path_item
+
+    def slow_dump_path_item(path_item):
+        dumped.append(path_item)
+        # Let the other threads run in the middle of the generation
+        time.sleep(0.001)
+        return dump_path_item(path_item)
+
+    app._dump_path_item = slow_dump_path_item  # type: ignore[method-assign]
+    barrier = threading.Barrier(4)
+    results = []
+
+    def get_doc():
+        client = app.test_client()
+        barrier.wait()
+        resp = client.get("/openapi/openapi.json")
+        results.append((resp.status_code, len(resp.json["paths"])))
+
+    threads = [threading.Thread(target=get_doc) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [(200, 50)] * 4
+    # The document is generated once, the other requests wait for it
+    assert len(dumped) == 50
@@ -0,0 +1,62 @@
+import pytest
+from pydantic import BaseModel
+
+from flask_openapi3 import OpenAPI
+
+app = OpenAPI(__name__)
+app.config["TESTING"] = True
+
+
+class BookBody(BaseModel):
+    age: int
+    tags: list[str] = []
+
+
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    return client
+
+
+@app.post("/book")
+def create_book(body: BookBody):
+    return {"age": body.age, "tags": body.tags}
+
+
+def test_validate_raw_bytes(client, monkeypatch):
+    def fail(*args, **kwargs):  # pragma: no cover
+        raise AssertionError("the body should be validated from the raw bytes")
+
+    monkeypatch.setattr(app.request_class, "get_json", fail)
+
+    resp = client.post("/book", data=b'{"age": "3", "tags": ["a"]}', content_type="application/json")
+    assert resp.status_code == 200
+    assert resp.json == {"age": 3, "tags": ["a"]}
+
+
+def test_string_body(client):
+    resp = client.post("/book", json='{"age": 3}')
+    assert resp.status_code == 200
+    assert resp.json == {"age": 3, "tags": []}
+
+
+@pytest.mark.parametrize(
+    "data, content_type",
+    [
+        (b"", "application/json"),
+        (b"{age: 1}", "application/json"),
+        (b'{"age": 1}', "text/plain"),
+    ],
+)
+def test_invalid_body(client, data, content_type):
+    resp = client.post("/book", data=data, content_type=content_type)
+    assert resp.status_code == 422
+    assert resp.json[0]["type"] == "model_type"
+    assert resp.json[0]["input"] is None
+
+
+def test_validation_error(client):
+    resp = client.post("/book", json={"age": "x"})
+    assert resp.status_code == 422
+    assert resp.json[0]["loc"] == ["age"]
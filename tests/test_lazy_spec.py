@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# @Author  : llc
+# @Time    : 2025/6/20 10:12
+import threading
+import time
+
+from pydantic import BaseModel
+
+from flask_openapi3 import APIBlueprint, APIView, OpenAPI, Tag
+
+
+class BookQuery(BaseModel):
+    age: int
+
+
+class BookBody(BaseModel):
+    name: str
+
+
+class BookResponse(BaseModel):
+    name: str
+    age: int
+
+
+def create_app(lazy_spec: bool) -> OpenAPI:
+    app = OpenAPI(__name__, lazy_spec=lazy_spec)
+    app.config["TESTING"] = True
+
+    @app.get("/book", responses={200: BookResponse})
+    def get_book(query: BookQuery):
+        return {"name": "S", "age": query.age}
+
+    api = APIBlueprint("book", __name__, url_prefix="/api", lazy_spec=lazy_spec)
+
+    @api.post("/book", tags=[Tag(name="book")])
+    def create_book(body: BookBody):
+        return {"name": body.name, "age": 1}
+
+    app.register_api(api, url_prefix="/v1")
+
+    api_view = APIView(url_prefix="/view", lazy_spec=lazy_spec)
+
+    @api_view.route("/book/<int:bid>")
+    class BookAPIView:
+        @api_view.doc(summary="get book")
+        def get(self, query: BookQuery):
+            return {"name": "S", "age": query.age}
+
+    app.register_api_view(api_view)
+
+    return app
+
+
+def test_lazy_spec_defers_collection():
+    app = create_app(lazy_spec=True)
+    assert app.paths == {}
+    assert app.components_schemas == {}
+
+    client = app.test_client()
+    assert client.get("/book?age=1").json == {"name": "S", "age": 1}
+    assert client.get("/book?age=a").status_code == 422
+    assert client.post("/v1/book", json={"name": "S"}).json == {"name": "S", "age": 1}
+    assert client.get("/view/book/1?age=2").json == {"name": "S", "age": 2}
+    assert app.paths == {}
+
+    app.api_doc
+    assert app._lazy_spec_collectors == []
+    assert set(app.paths) == {"/book", "/v1/book", "/view/book/{bid}"}
+
+
+def test_lazy_spec_matches_eager_spec():
+    lazy_app = create_app(lazy_spec=True)
+    eager_app = create_app(lazy_spec=False)
+
+    lazy_json = lazy_app.test_client().get("/openapi/openapi.json").json
+    eager_json = eager_app.test_client().get("/openapi/openapi.json").json
+    assert lazy_json == eager_json
+
+
+def test_lazy_spec_routes_added_after_access():
+    app = OpenAPI(__name__, lazy_spec=True)
+
+    @app.get("/book")
+    def get_book(query: BookQuery):
+        return "ok"  # pragma: no cover
+
+    assert set(app.api_doc["paths"]) == {"/book"}
+
+    @app.post("/book")
+    def create_book(body: BookBody):
+        return "ok"  # pragma: no cover
+
+    assert set(app.api_doc["paths"]["/book"]) == {"get", "post"}
+
+
+def test_lazy_spec_concurrent_first_requests():
+    app = create_app(lazy_spec=True)
+
+    def slow_collector(collector):
+        def collect():
+            # Let the other threads run in the middle of the collection
+            time.sleep(0.01)
+            collector()
+
+        return collect
+
+    app._lazy_spec_collectors = [slow_collector(collector) for collector in app._lazy_spec_collectors]
+    barrier = threading.Barrier(4)
+    results = []
+
+    def get_doc():
+        client = app.test_client()
+        barrier.wait()
+        resp = client.get("/openapi/openapi.json")
+        results.append((resp.status_code, sorted(resp.json["paths"])))
+
+    threads = [threading.Thread(target=get_doc) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [(200, ["/book", "/v1/book", "/view/book/{bid}"])] * 4
@@ -29,6 +29,12 @@ class BookHeader(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
 
+class BookHeaderAllow(BaseModel):
+    api_key: str = Field(..., description="API Key")
+
+    model_config = ConfigDict(extra="allow")
+
+
 @pytest.fixture
 def client():
     client = app.test_client()
@@ -62,6 +68,11 @@ def get_book(header: BookHeader):
     return header.model_dump(by_alias=True)
 
 
+@app.get("/header-allow")
+def get_book_allow(header: BookHeaderAllow):
+    return header.model_dump(by_alias=True)
+
+
 def test_form(client):
     data = {"string": "a", "string_list": ["a", "b", "c"]}
     r = client.post("/form", data=data, content_type="multipart/form-data")
@@ -72,3 +83,10 @@ def test_header(client):
     headers = {"Hello1": "111", "hello2": "222", "api_key": "333", "api_type": "A", "x-hello": "444"}
     resp = client.get("/header", headers=headers)
     assert resp.status_code == 422
+
+
+def test_header_allow(client):
+    resp = client.get("/header-allow", headers={"API-KEY": "333", "X-Hello": "444"})
+    assert resp.status_code == 200
+    assert resp.json["api_key"] == "333"
+    assert resp.json["X-Hello"] == "444"
@@ -0,0 +1,132 @@
+from http import HTTPStatus
+
+import pytest
+from pydantic import BaseModel, Field
+
+from flask_openapi3 import APIView, OpenAPI
+
+app = OpenAPI(__name__)
+app.config["TESTING"] = True
+
+
+class BookResponse(BaseModel):
+    book_id: int = Field(..., alias="bookId")
+    name: str
+
+
+class EBookResponse(BookResponse):
+    url: str
+
+
+class AuthorResponse(BaseModel):
+    name: str
+
+
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    return client
+
+
+@app.get("/book", responses={200: BookResponse})
+def get_book():
+    return BookResponse(bookId=1, name="a")
+
+
+@app.get("/books")
+def get_books():
+    return [BookResponse(bookId=1, name="a"), BookResponse(bookId=2, name="b")]
+
+
+@app.get("/mixed")
+def get_mixed():
+    return [
+        BookResponse(bookId=1, name="a"),
+        EBookResponse(bookId=2, name="b", url="https://b"),
+        AuthorResponse(name="c"),
+    ]
+
+
+@app.get("/ebooks")
+def get_ebooks():
+    return [EBookResponse(bookId=1, name="a", url="https://a"), BookResponse(bookId=2, name="b")]
+
+
+@app.post("/book")
+def create_book():
+    return BookResponse(bookId=1, name="a"), HTTPStatus.CREATED, {"X-Book": "1"}
+
+
+@app.put("/book")
+def update_book():
+    return BookResponse(bookId=1, name="a"), {"X-Book": "1"}
+
+
+@app.get("/dict")
+def get_dict():
+    return {"name": "a"}, 201
+
+
+api_view = APIView()
+
+
+@api_view.route("/view/book")
+class BookAPIView:
+    @api_view.doc(responses={200: BookResponse}, validate_response=True)
+    def get(self):
+        return BookResponse(bookId=1, name="a")
+
+
+app.register_api_view(api_view)
+
+
+def test_model(client):
+    resp = client.get("/book")
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/json"
+    assert resp.json == {"bookId": 1, "name": "a"}
+
+
+def test_model_list(client):
+    resp = client.get("/books")
+    assert resp.status_code == 200
+    assert resp.json == [{"bookId": 1, "name": "a"}, {"bookId": 2, "name": "b"}]
+
+
+def test_model_list_mixed_types(client):
+    resp = client.get("/mixed")
+    assert resp.status_code == 200
+    assert resp.json == [
+        {"bookId": 1, "name": "a"},
+        {"bookId": 2, "name": "b", "url": "https://b"},
+        {"name": "c"},
+    ]
+
+    resp = client.get("/ebooks")
+    assert resp.json == [{"bookId": 1, "name": "a", "url": "https://a"}, {"bookId": 2, "name": "b"}]
+
+
+def test_model_status_and_headers(client):
+    resp = client.post("/book")
+    assert resp.status_code == 201
+    assert resp.headers["X-Book"] == "1"
+    assert resp.json == {"bookId": 1, "name": "a"}
+
+
+def test_model_headers(client):
+    resp = client.put("/book")
+    assert resp.status_code == 200
+    assert resp.headers["X-Book"] == "1"
+
+
+def test_dict(client):
+    resp = client.get("/dict")
+    assert resp.status_code == 201
+    assert resp.json == {"name": "a"}
+
+
+def test_api_view_validated_model(client):
+    resp = client.get("/view/book")
+    assert resp.status_code == 200
+    assert resp.json == {"bookId": 1, "name": "a"}
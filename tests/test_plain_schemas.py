@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# @Author  : llc
+# @Time    : 2025/7/9 10:37
+import copy
+
+import pytest
+from pydantic import BaseModel, Field, ValidationError
+
+from flask_openapi3 import APIBlueprint, APIView, OpenAPI
+from flask_openapi3.utils import get_model_schema
+
+
+class Author(BaseModel):
+    name: str = Field(..., json_schema_extra={"x-internal": True})
+
+
+class BookQuery(BaseModel):
+    age: int = Field(..., ge=2, description="Age")
+    tags: list[str] | None = None
+
+
+class BookHeader(BaseModel):
+    api_key: str
+
+
+class BookPath(BaseModel):
+    bid: int
+
+
+class BookBody(BaseModel):
+    title: str
+    authors: list[Author]
+
+
+class BookResponse(BaseModel):
+    bid: int
+    authors: list[Author]
+
+
+class ErrorDetail(BaseModel):
+    location: str
+    message: str
+
+
+class ValidationErrorModel(BaseModel):
+    code: str
+    details: list[ErrorDetail]
+
+
+def create_app(plain_schemas: bool) -> OpenAPI:
+    app = OpenAPI(__name__, plain_schemas=plain_schemas, validation_error_model=ValidationErrorModel)
+
+    @app.post("/book", responses={200: BookResponse, 204: None})
+    def create_book(query: BookQuery, header: BookHeader, body: BookBody):
+        return "ok"
+
+    api = APIBlueprint("book", __name__, url_prefix="/api", plain_schemas=plain_schemas)
+
+    @api.get("/book/<int:bid>", responses={200: BookResponse})
+    def get_book(path: BookPath):
+        return "ok"
+
+    app.register_api(api)
+
+    view = APIView(url_prefix="/view", plain_schemas=plain_schemas)
+
+    @view.route("/book")
+    class BookAPIView:
+        @view.doc(summary="create book", responses={200: BookResponse})
+        def post(self, body: BookBody):
+            return "ok"
+
+    app.register_api_view(view)
+
+    return app
+
+
+def test_plain_schemas():
+    spec_json = create_app(True).api_doc
+    schemas = spec_json["components"]["schemas"]
+    assert schemas["Author"]["properties"]["name"]["x-internal"] is True
+    assert "$defs" not in schemas["BookBody"]
+    assert "$defs" not in schemas["ValidationErrorModel"]
+    assert "location" in schemas["ErrorDetail"]["properties"]
+
+    default_spec_json = create_app(False).api_doc
+    del schemas["Author"]["properties"]["name"]["x-internal"]
+    assert spec_json == default_spec_json
+
+
+def test_plain_schemas_are_shared():
+    app = create_app(True)
+    # Identical schemas are stored once, the response model registered first
+    author = get_model_schema(BookResponse, mode="serialization")["$defs"]["Author"]
+    assert app.components_schemas["Author"] is author
+    parameters = app.paths["/book"].post.parameters
+    age = next(parameter for parameter in parameters if parameter.name == "age")
+    assert age.param_schema is get_model_schema(BookQuery)["properties"]["age"]
+
+
+def test_plain_schemas_are_read_only():
+    app = create_app(True)
+    author = app.components_schemas["Author"]
+    with pytest.raises(TypeError):
+        author["title"] = "Writer"
+    with pytest.raises(TypeError):
+        author["required"].append("age")
+    with pytest.raises(TypeError):
+        app.paths["/book"].post.parameters[0].param_schema.update(title="Age")
+
+    # Copies can be changed
+    author = copy.deepcopy(author)
+    author["required"].append("age")
+    assert author["required"] == ["name", "age"]
+    assert get_model_schema(BookResponse, mode="serialization")["$defs"]["Author"]["required"] == ["name"]
+
+
+def test_plain_schemas_validate_user_responses():
+    app = OpenAPI(__name__, plain_schemas=True)
+
+    with pytest.raises(ValidationError):
+
+        @app.get("/book", responses={200: {"content": "invalid"}})
+        def get_book():
+            return "ok"  # pragma: no cover
@@ -175,6 +175,13 @@ def test_header(client):
     assert resp.json == headers
 
 
+def test_header_ignores_extra(client):
+    headers = {"HELLO2": "222", "API-KEY": "333", "X-Hello": "444", "X-Forwarded-For": "127.0.0.1"}
+    resp = client.get("/header", headers=headers)
+    assert resp.status_code == 200
+    assert resp.json == {"Hello1": "what's up", "hello2": "222", "api_key": "333", "api_type": None, "x-hello": "444"}
+
+
 def test_raw(client):
     resp = client.post("/raw", data="raw", headers={"Content-Type": "text/plain"})
     assert resp.status_code == 200
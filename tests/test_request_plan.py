@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+from typing import Literal
+
+import pytest
+from pydantic import BaseModel, Field
+
+from flask_openapi3 import FileStorage, OpenAPI
+from flask_openapi3.request import RequestPlan
+
+app = OpenAPI(__name__)
+app.config["TESTING"] = True
+
+
+class BookQuery(BaseModel):
+    age: list[int]
+    author: str | None = None
+    page_size: int = Field(20, alias="pageSize")
+    empty: None = None
+
+
+class BookHeader(BaseModel):
+    api_key: str
+    x_hello: str | None = Field(None, alias="x-hello")
+
+
+class BookForm(BaseModel):
+    file: FileStorage
+    files: list[FileStorage]
+    string_list: list[str] | None = None
+
+
+@pytest.fixture
+def client():
+    client = app.test_client()
+
+    return client
+
+
+@app.get("/book")
+def get_book(query: BookQuery, header: BookHeader):
+    return {"age": query.age, "page_size": query.page_size, "api_key": header.api_key, "x_hello": header.x_hello}
+
+
+def test_compile_fields():
+    plan = RequestPlan(header=BookHeader, query=BookQuery, form=BookForm)
+
+    assert [(f.key, f.lookup, f.kind, f.nullable) for f in plan.query_fields] == [
+        ("age", ("age",), "list", False),
+        ("author", ("author",), "scalar", False),
+        ("pageSize", ("pageSize",), "scalar", False),
+        ("empty", ("empty",), "scalar", True),
+    ]
+    assert [f.lookup for f in plan.header_fields] == [("Api-Key",), ("X-Hello",)]
+    # A form sends Optional[list] as a single JSON encoded value
+    assert [f.kind for f in plan.form_fields] == ["file", "file_list", "scalar"]
+
+
+def test_compile_form_json_fields():
+    class Tag(BaseModel):
+        name: str
+
+    class TagForm(BaseModel):
+        name: str
+        age: int | None
+        tag: Tag
+        tag_or_name: Tag | str
+        tags: list[Tag]
+        names: list[str] | None
+        matrix: list[list[int]]
+        metadata: dict[str, str]
+        level: Literal[1, 2]
+        flag: Literal[True] | None = None
+        kind: Literal["a", "b"] = "a"
+        empty: None = None
+
+    plan = RequestPlan(form=TagForm)
+
+    assert {f.key: f.json for f in plan.form_fields} == {
+        "name": False,
+        "age": False,
+        "tag": True,
+        "tag_or_name": True,
+        "tags": True,
+        "names": True,
+        "matrix": True,
+        "metadata": True,
+        "level": True,
+        "flag": True,
+        "kind": False,
+        "empty": True,
+    }
+
+
+def test_plan_is_not_rebuilt_per_request(client, monkeypatch):
+    def fail(*args, **kwargs):  # pragma: no cover
+        raise AssertionError("model_json_schema should not be called per request")
+
+    monkeypatch.setattr(BookQuery, "model_json_schema", fail)
+    monkeypatch.setattr(BookHeader, "model_json_schema", fail)
+
+    resp = client.get("/book?age=1&age=2&pageSize=5", headers={"api_key": "secret", "x-hello": "hi"})
+    assert resp.status_code == 200
+    assert resp.json == {"age": [1, 2], "page_size": 5, "api_key": "secret", "x_hello": "hi"}
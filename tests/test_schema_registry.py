@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+# @Author  : llc
+# @Time    : 2025/7/7 16:52
+import logging
+from decimal import Decimal
+
+import pytest
+from pydantic import BaseModel, computed_field, create_model
+
+from flask_openapi3 import APIBlueprint, APIView, OpenAPI
+from flask_openapi3.models import OPENAPI3_REF_PREFIX
+from flask_openapi3.utils import merge_components_schemas
+
+Book = create_model("Book", title=(str, ...))
+OtherBook = create_model("Book", name=(str, ...), pages=(int, ...))
+
+Item = create_model("Item", price=(float, ...))
+OtherItem = create_model("Item", sku=(str, ...))
+
+
+class Order(BaseModel):
+    item: Item  # type: ignore[valid-type]
+
+
+class OtherOrder(BaseModel):
+    item: OtherItem  # type: ignore[valid-type]
+
+
+class BookQuery(BaseModel):
+    age: int
+
+
+class Price(BaseModel):
+    amount: Decimal
+
+
+class Product(BaseModel):
+    name: str
+    price: Price
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def label(self) -> str:
+        return self.name.title()
+
+
+class Cart(BaseModel):
+    price: Price
+
+
+def ref(name: str) -> str:
+    return f"{OPENAPI3_REF_PREFIX}/{name}"
+
+
+def body_ref(spec_json: dict, uri: str, method: str = "post") -> str:
+    return spec_json["paths"][uri][method]["requestBody"]["content"]["application/json"]["schema"]["$ref"]
+
+
+def test_name_collision(caplog):
+    app = OpenAPI(__name__)
+
+    @app.post("/book")
+    def create_book(body: Book):  # type: ignore[valid-type]
+        return "ok"
+
+    @app.post("/other-book")
+    def create_other_book(body: OtherBook):  # type: ignore[valid-type]
+        return "ok"
+
+    @app.post("/other-book2")
+    def create_other_book2(body: OtherBook):  # type: ignore[valid-type]
+        return "ok"
+
+    spec_json = app.api_doc
+    schemas = spec_json["components"]["schemas"]
+    assert body_ref(spec_json, "/book") == ref("Book")
+    other_name = body_ref(spec_json, "/other-book").removeprefix(f"{OPENAPI3_REF_PREFIX}/")
+    assert other_name.startswith("Book_")
+    assert f"renamed to {other_name!r}" in caplog.text
+    assert body_ref(spec_json, "/other-book2") == ref(other_name)
+    assert set(schemas["Book"]["properties"]) == {"title"}
+    assert set(schemas[other_name]["properties"]) == {"name", "pages"}
+
+
+def test_nested_name_collision():
+    app = OpenAPI(__name__)
+
+    @app.post("/order")
+    def create_order(body: Order):
+        return "ok"
+
+    @app.post("/other-order")
+    def create_other_order(body: OtherOrder):
+        return "ok"
+
+    schemas = app.api_doc["components"]["schemas"]
+    assert set(schemas["Item"]["properties"]) == {"price"}
+    assert schemas["Order"]["properties"]["item"]["$ref"] == ref("Item")
+    other_item = schemas["OtherOrder"]["properties"]["item"]["$ref"].removeprefix(f"{OPENAPI3_REF_PREFIX}/")
+    assert other_item != "Item"
+    assert set(schemas[other_item]["properties"]) == {"sku"}
+
+
+def test_blueprint_name_collision():
+    app = OpenAPI(__name__)
+    api = APIBlueprint("book", __name__, url_prefix="/api")
+
+    @api.post("/book")
+    def create_book(body: Book):  # type: ignore[valid-type]
+        return "ok"
+
+    view = APIView(url_prefix="/view")
+
+    @view.route("/book")
+    class BookAPIView:
+        @view.doc(summary="create book")
+        def post(self, body: OtherBook):  # type: ignore[valid-type]
+            return "ok"
+
+    app.register_api(api)
+    app.register_api_view(view)
+
+    spec_json = app.api_doc
+    assert body_ref(spec_json, "/api/book") == ref("Book")
+    other_name = body_ref(spec_json, "/view/book").removeprefix(f"{OPENAPI3_REF_PREFIX}/")
+    assert other_name.startswith("Book_")
+    assert set(spec_json["components"]["schemas"][other_name]["properties"]) == {"name", "pages"}
+
+    # The APIView keeps its own references
+    assert view.paths["/view/book"].post.requestBody.content["application/json"].media_type_schema.ref == ref("Book")
+
+
+def test_identical_schemas_are_shared():
+    app = OpenAPI(__name__)
+    api = APIBlueprint("book", __name__, url_prefix="/api")
+
+    @app.get("/book")
+    def get_book(query: BookQuery):
+        return "ok"
+
+    @api.post("/book")
+    def create_book(body: Order):
+        return "ok"
+
+    @api.post("/order")
+    def create_order(body: Order):
+        return "ok"
+
+    app.register_api(api)
+    assert app.components_schemas["Order"] is api.components_schemas["Order"]
+    assert app.components_schemas["Item"] is api.components_schemas["Item"]
+    assert "Order_" not in "".join(app.api_doc["components"]["schemas"])
+
+
+def test_input_and_output_schemas(caplog):
+    app = OpenAPI(__name__)
+
+    @app.get("/product", responses={200: Product})
+    def get_product():
+        return "ok"  # pragma: no cover
+
+    @app.post("/product", responses={200: Product})
+    def create_product(body: Product):
+        return "ok"  # pragma: no cover
+
+    api = APIBlueprint("product", __name__, url_prefix="/api")
+
+    @api.put("/product", responses={200: Product})
+    def update_product(body: Product):
+        return "ok"  # pragma: no cover
+
+    with caplog.at_level(logging.WARNING, logger="flask_openapi3"):
+        app.register_api(api)
+        spec_json = app.api_doc
+
+    assert caplog.records == []
+    schemas = spec_json["components"]["schemas"]
+    assert {"Product", "Product-Input", "Price", "Price-Input"} <= set(schemas)
+    assert "label" in schemas["Product"]["properties"]
+    assert "label" not in schemas["Product-Input"]["properties"]
+    assert schemas["Product-Input"]["properties"]["price"]["$ref"] == ref("Price-Input")
+    assert body_ref(spec_json, "/product") == ref("Product-Input")
+    assert body_ref(spec_json, "/api/product", "put") == ref("Product-Input")
+    response = spec_json["paths"]["/api/product"]["put"]["responses"]["200"]
+    assert response["content"]["application/json"]["schema"]["$ref"] == ref("Product")
+
+
+@pytest.mark.parametrize("view_first", [True, False])
+def test_input_and_output_references(caplog, view_first):
+    app = OpenAPI(__name__)
+    api = APIBlueprint("cart", __name__, url_prefix="/api")
+
+    @api.post("/cart")
+    def create_cart(body: Cart):
+        return "ok"  # pragma: no cover
+
+    view = APIView(url_prefix="/view")
+
+    @view.route("/cart")
+    class CartAPIView:
+        @view.doc(summary="get cart", responses={200: Cart})
+        def get(self):
+            return "ok"  # pragma: no cover
+
+    with caplog.at_level(logging.WARNING, logger="flask_openapi3"):
+        if view_first:
+            app.register_api_view(view)
+            app.register_api(api)
+        else:
+            app.register_api(api)
+            app.register_api_view(view)
+        spec_json = app.api_doc
+
+    assert caplog.records == []
+    # Cart only differs by the schema of Price it refers to
+    schemas = spec_json["components"]["schemas"]
+    body_name = body_ref(spec_json, "/api/cart").removeprefix(f"{OPENAPI3_REF_PREFIX}/")
+    response = spec_json["paths"]["/view/cart"]["get"]["responses"]["200"]
+    response_name = response["content"]["application/json"]["schema"]["$ref"].removeprefix(f"{OPENAPI3_REF_PREFIX}/")
+    assert (body_name, response_name) == (("Cart-Input", "Cart") if view_first else ("Cart", "Cart-Output"))
+    assert schemas[body_name]["properties"]["price"]["$ref"] == ref("Price-Input" if view_first else "Price")
+    assert schemas[response_name]["properties"]["price"]["$ref"] == ref("Price" if view_first else "Price-Output")
+
+
+def test_name_collision_across_modes(caplog):
+    app = OpenAPI(__name__)
+
+    @app.post("/book", responses={200: Book})
+    def create_book(body: OtherBook):  # type: ignore[valid-type]
+        return "ok"  # pragma: no cover
+
+    api = APIBlueprint("book", __name__, url_prefix="/api")
+
+    @api.get("/book", responses={200: OtherBook})
+    def get_book():
+        return "ok"  # pragma: no cover
+
+    with caplog.at_level(logging.WARNING, logger="flask_openapi3"):
+        app.register_api(api)
+        spec_json = app.api_doc
+
+    # Warned about for the route and for the blueprint
+    assert len(caplog.records) == 2
+    schemas = spec_json["components"]["schemas"]
+    assert "Book-Input" not in schemas
+    assert "Book-Output" not in schemas
+    assert set(schemas["Book"]["properties"]) == {"title"}
+    other_name = body_ref(spec_json, "/book").removeprefix(f"{OPENAPI3_REF_PREFIX}/")
+    assert other_name.startswith("Book_")
+    assert set(schemas[other_name]["properties"]) == {"name", "pages"}
+    # The other Book is stored once, whichever way it is used
+    response = spec_json["paths"]["/api/book"]["get"]["responses"]["200"]
+    assert response["content"]["application/json"]["schema"]["$ref"] == ref(other_name)
+    assert [name for name in schemas if name.startswith("Book")] == ["Book", other_name]
+
+
+def test_merge_components_schemas():
+    components_schemas: dict = {}
+    assert merge_components_schemas(components_schemas, {"A": {"type": "string"}}) == {}
+    assert merge_components_schemas(components_schemas, {"A": {"type": "string"}}) == {}
+
+    renames = merge_components_schemas(
+        components_schemas, {"A": {"type": "integer"}, "B": {"type": "array", "items": {"$ref": ref("A")}}}
+    )
+    assert list(renames) == ["A"]
+    assert components_schemas["A"].type == "string"
+    assert components_schemas[renames["A"]].type == "integer"
+    assert components_schemas["B"].items.ref == ref(renames["A"])
+
+    assert merge_components_schemas(components_schemas, {"A": {"type": "integer"}}) == renames
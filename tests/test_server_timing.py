@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# @Author  : llc
+# @Time    : 2025/6/22 11:05
+import pytest
+from pydantic import BaseModel
+
+from flask_openapi3 import APIView, OpenAPI
+from flask_openapi3.signals import request_timed
+
+
+class BookQuery(BaseModel):
+    age: int
+
+
+class BookBody(BaseModel):
+    name: str
+
+
+class BookResponse(BaseModel):
+    name: str
+    age: int
+
+
+def create_app(**kwargs) -> OpenAPI:
+    app = OpenAPI(__name__, **kwargs)
+    app.config["TESTING"] = True
+
+    @app.post("/book", responses={200: BookResponse}, validate_response=True)
+    def create_book(query: BookQuery, body: BookBody):
+        return {"name": body.name, "age": query.age}
+
+    @app.get("/async-book")
+    async def get_book(query: BookQuery):
+        return "ok"
+
+    api_view = APIView()
+
+    @api_view.route("/view-book")
+    class BookAPIView:
+        @api_view.doc(summary="get book")
+        def get(self, query: BookQuery):
+            return BookResponse(name="S", age=query.age)
+
+    app.register_api_view(api_view)
+
+    return app
+
+
+@pytest.fixture
+def timings():
+    received = []
+
+    def receiver(sender, timings):
+        received.append(timings)
+
+    with request_timed.connected_to(receiver):
+        yield received
+
+
+def test_disabled():
+    client = create_app().test_client()
+    resp = client.post("/book?age=1", json={"name": "S"})
+    assert resp.status_code == 200
+    assert "Server-Timing" not in resp.headers
+
+
+def test_server_timing():
+    client = create_app(server_timing=True).test_client()
+    resp = client.post("/book?age=1", json={"name": "S"})
+    assert resp.json == {"name": "S", "age": 1}
+    metrics = [metric.split(";")[0] for metric in resp.headers["Server-Timing"].split(", ")]
+    assert metrics == ["query", "body", "handler", "validate_response"]
+    assert all(";dur=" in metric for metric in resp.headers["Server-Timing"].split(", "))
+
+
+def test_server_timing_validation_error():
+    client = create_app(server_timing=True).test_client()
+    resp = client.post("/book?age=1", json={"age": 1})
+    assert resp.status_code == 422
+    metrics = [metric.split(";")[0] for metric in resp.headers["Server-Timing"].split(", ")]
+    assert metrics == ["query", "body"]
+
+
+def test_request_timed_signal(timings):
+    client = create_app().test_client()
+    assert client.post("/book?age=1", json={"name": "S"}).status_code == 200
+    assert client.get("/async-book?age=1").status_code == 200
+    assert client.get("/view-book?age=1").json == {"name": "S", "age": 1}
+    assert client.get("/view-book?age=a").status_code == 422
+
+    assert [list(t) for t in timings] == [
+        ["query", "body", "handler", "validate_response"],
+        ["query", "handler"],
+        ["query", "handler"],
+        ["query"],
+    ]
+    assert all(seconds >= 0 for t in timings for seconds in t.values())
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# @Author  : llc
+# @Time    : 2025/7/2 9:41
+import pytest
+from pydantic import BaseModel
+
+from flask_openapi3 import Info, OpenAPI
+
+
+class BookQuery(BaseModel):
+    age: int
+
+
+class BookResponse(BaseModel):
+    name: str
+    age: int
+
+
+def create_app(spec_cache, lazy_spec: bool = False, version: str = "1.0.0") -> OpenAPI:
+    app = OpenAPI(__name__, info=Info(title="Book API", version=version), spec_cache=spec_cache, lazy_spec=lazy_spec)
+    app.config["TESTING"] = True
+
+    @app.get("/book", responses={200: BookResponse})
+    def get_book(query: BookQuery):
+        return {"name": "S", "age": query.age}
+
+    return app
+
+
+def fail_generation():
+    raise AssertionError("the spec should be loaded from the cache")
+
+
+@pytest.mark.parametrize("lazy_spec", [False, True])
+def test_spec_cache(tmp_path, monkeypatch, lazy_spec):
+    spec_cache = tmp_path / "openapi.cache"
+    app = create_app(spec_cache, lazy_spec)
+    resp = app.test_client().get("/openapi/openapi.json")
+    assert resp.status_code == 200
+    assert spec_cache.read_bytes().endswith(resp.data)
+
+    app = create_app(spec_cache, lazy_spec)
+    monkeypatch.setattr(app, "generate_spec_json", fail_generation)
+    cached = app.test_client().get("/openapi/openapi.json")
+    assert cached.data == resp.data
+    assert cached.headers["ETag"] == resp.headers["ETag"]
+    assert app.api_doc == resp.json
+
+
+def test_spec_cache_fingerprint_changed(tmp_path):
+    spec_cache = tmp_path / "openapi.cache"
+    assert create_app(spec_cache).api_doc["info"]["version"] == "1.0.0"
+    assert create_app(spec_cache, version="2.0.0").api_doc["info"]["version"] == "2.0.0"
+    assert create_app(spec_cache, version="2.0.0").api_doc["info"]["version"] == "2.0.0"
+
+
+def test_spec_cache_invalid(tmp_path):
+    spec_cache = tmp_path / "openapi.cache"
+    spec_cache.write_bytes(b"")
+    assert "/book" in create_app(spec_cache).api_doc["paths"]
+
+    create_app(spec_cache).api_doc
+    fingerprint = spec_cache.read_bytes().split(b"\n", 1)[0]
+    spec_cache.write_bytes(fingerprint + b"\n{")
+    assert "/book" in create_app(spec_cache).api_doc["paths"]
+
+
+def test_spec_cache_invalidate(tmp_path):
+    spec_cache = tmp_path / "openapi.cache"
+    create_app(spec_cache, lazy_spec=True).api_doc
+
+    app = create_app(spec_cache, lazy_spec=True)
+    assert "/book" in app.api_doc["paths"]
+
+    app.invalidate_spec()
+    spec_json = app.api_doc
+    assert "/book" in spec_json["paths"]
+    assert "BookResponse" in spec_json["components"]["schemas"]
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# @Author  : llc
+# @Time    : 2025/7/4 11:26
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+from pydantic import BaseModel
+
+from flask_openapi3 import APIBlueprint, APIView, OpenAPI
+from flask_openapi3.utils import clear_model_schema_cache, get_model_schema, prefetch_model_schemas
+
+
+class BookQuery(BaseModel):
+    age: int
+
+
+class BookPath(BaseModel):
+    bid: int
+
+
+class Author(BaseModel):
+    name: str
+
+
+class BookResponse(BaseModel):
+    name: str
+    authors: list[Author]
+
+
+class ErrorResponse(BaseModel):
+    message: str
+
+
+def create_app(spec_executor=None, lazy_spec: bool = True) -> OpenAPI:
+    app = OpenAPI(__name__, responses={500: ErrorResponse}, lazy_spec=lazy_spec, spec_executor=spec_executor)
+
+    @app.get("/book", responses={200: BookResponse})
+    def get_book(query: BookQuery):
+        return {"name": "S", "authors": []}
+
+    api = APIBlueprint("book", __name__, url_prefix="/api", lazy_spec=lazy_spec)
+
+    @api.get("/book", responses={200: BookResponse})
+    def get_api_book(query: BookQuery):
+        return {"name": "S", "authors": []}
+
+    app.register_api(api)
+
+    view = APIView(url_prefix="/view", lazy_spec=lazy_spec)
+
+    @view.route("/book/<int:bid>")
+    class BookAPIView:
+        @view.doc(summary="get book", responses={200: BookResponse})
+        def get(self, path: BookPath):
+            return {"name": "S", "authors": []}
+
+    app.register_api_view(view)
+
+    return app
+
+
+def dump(app: OpenAPI) -> bytes:
+    return app.test_client().get("/openapi/openapi.json").data
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.items = []
+
+    def map(self, fn, *iterables, **kwargs):
+        items = list(iterables[0])
+        self.items.extend(items)
+        return super().map(fn, items, **kwargs)
+
+
+@pytest.mark.parametrize("executor_class", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_spec_executor(executor_class):
+    clear_model_schema_cache()
+    expected = dump(create_app())
+
+    clear_model_schema_cache()
+    with executor_class(max_workers=2) as executor:
+        assert dump(create_app(executor)) == expected
+
+    with executor_class(max_workers=2) as executor:
+        assert dump(create_app(executor, lazy_spec=False)) == expected
+
+
+def test_spec_executor_prefetch():
+    clear_model_schema_cache()
+    with CountingExecutor() as executor:
+        app = create_app(executor)
+        spec_json = app.api_doc
+
+    prefetched = {item[0] for item in executor.items if isinstance(item, tuple)}
+    assert prefetched == {ErrorResponse, BookResponse}
+    assert set(spec_json["components"]["schemas"]) >= {"ErrorResponse", "BookResponse", "Author"}
+
+
+def test_prefetch_model_schemas():
+    clear_model_schema_cache()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        prefetch_model_schemas([BookQuery, BookResponse, BookQuery], executor)
+    schema = get_model_schema(BookResponse)
+
+    clear_model_schema_cache()
+    assert get_model_schema(BookResponse) == schema
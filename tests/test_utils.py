@@ -1,9 +1,61 @@
 # -*- coding: utf-8 -*-
 # @Author  : llc
 # @Time    : 2022/12/19 10:34
+from http import HTTPStatus
 
-from flask_openapi3.utils import normalize_name
+from pydantic import BaseModel, Field
+
+from flask_openapi3.utils import ResponseModels, clear_model_schema_cache, get_model_schema, normalize_name
 
 
 def test_normalize_name():
     assert "List-Generic.Response_Detail_" == normalize_name("List-Generic.Response[Detail]")
+
+
+def test_get_model_schema_cache():
+    class Book(BaseModel):
+        book_id: int = Field(..., alias="bookId")
+
+    schema = get_model_schema(Book)
+    assert get_model_schema(Book) is schema
+    assert "bookId" in schema["properties"]
+    assert get_model_schema(Book, mode="serialization") is not schema
+
+    clear_model_schema_cache()
+    assert get_model_schema(Book) is not schema
+    assert get_model_schema(Book) == schema
+
+
+def test_response_models():
+    class Ok(BaseModel):
+        code: int
+
+    class Created(BaseModel):
+        code: int
+
+    class ClientError(BaseModel):
+        message: str
+
+    class Error(BaseModel):
+        message: str
+
+    response_models = ResponseModels(
+        {
+            HTTPStatus.OK: Ok,
+            "201": Created,
+            "2XX": Error,
+            204: None,
+            "4xx": ClientError,
+            404: {"description": "Not Found"},
+            "default": Error,
+        }
+    )
+    assert response_models[200] is Ok
+    assert response_models.get_model(HTTPStatus.CREATED) is Created
+    assert response_models.get_model(202) is Error
+    # Explicit status codes without a model are not validated
+    assert response_models.get_model(204) is None
+    assert response_models.get_model(404) is None
+    assert response_models.get_model(400) is ClientError
+    assert response_models.get_model(500) is Error
+    assert ResponseModels({200: Ok}).get_model(500) is None
@@ -106,3 +106,26 @@ def test_get_book_detail_happy(app, client):
     response = client.get("/v1/books/some_book_name", headers={"Authorization": "Bearer sometoken"})
     assert response.status_code == 200
     assert response.json == {"name": "some_book_name", "client_id": "client1234565"}
+
+
+def test_parse_parameters_once(app, client, monkeypatch):
+    from flask_openapi3 import request as request_module
+
+    calls = []
+    parse_parameters = request_module.parse_parameters
+
+    def counting_parse_parameters(func, **kwargs):
+        calls.append(func)
+        return parse_parameters(func, **kwargs)
+
+    monkeypatch.setattr(request_module, "parse_parameters", counting_parse_parameters)
+
+    @request_module.validate_request()
+    def view(path: BookNamePath):
+        return path.name
+
+    with app.test_request_context("/"):
+        assert view(name="a") == "a"
+        assert view(name="b") == "b"
+
+    assert calls == [view.__wrapped__]
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import logging
+
 import pytest
+from flask import current_app
 from pydantic import BaseModel, ValidationError
 
 from flask_openapi3 import APIView, OpenAPI
@@ -192,3 +195,234 @@ def test_apiview_api_level_validate_response(request):
     with test_app.test_client() as client:
         with pytest.raises(ValidationError):
             _ = client.post("/test", json={"test_int": 1, "test_str": "s"})
+
+
+def test_sampled_validate_response(request, monkeypatch):
+    """
+    A float only validates that fraction of the responses
+    """
+    test_app = OpenAPI(request.node.name, validate_response=0.25)
+    test_app.config["TESTING"] = True
+
+    @test_app.post("/test", responses={201: BadResponse})
+    def endpoint_test(body: BaseRequest):
+        return body.model_dump(), 201
+
+    with test_app.test_client() as client:
+        monkeypatch.setattr("flask_openapi3.scaffold.random", lambda: 0.5)
+        resp = client.post("/test", json={"test_int": 1, "test_str": "s"})
+        assert resp.status_code == 201
+
+        monkeypatch.setattr("flask_openapi3.scaffold.random", lambda: 0.1)
+        with pytest.raises(ValidationError):
+            _ = client.post("/test", json={"test_int": 1, "test_str": "s"})
+
+
+def test_api_level_disables_sampled_validate_response(request):
+    """
+    A rate of 0 at api level turns off validation turned on at view level
+    """
+    test_app = OpenAPI(request.node.name)
+    test_app.config["TESTING"] = True
+    test_api_view = APIView(validate_response=True)
+
+    @test_api_view.route("/test")
+    class TestAPI:
+        @test_api_view.doc(responses={201: BadResponse}, validate_response=0.0)
+        def post(self, body: BaseRequest):
+            return body.model_dump(), 201
+
+    test_app.register_api_view(test_api_view)
+
+    with test_app.test_client() as client:
+        resp = client.post("/test", json={"test_int": 1, "test_str": "s"})
+        assert resp.status_code == 201
+
+
+@pytest.mark.parametrize("mode", ["log", "background"])
+def test_validate_response_mode(request, mode):
+    """
+    Violations are reported to the callback instead of failing the request
+    """
+    errors = []
+
+    def response_validation_error_callback(e, endpoint):
+        errors.append((e.errors()[0]["loc"], endpoint))
+
+    test_app = OpenAPI(
+        request.node.name,
+        validate_response=True,
+        validate_response_mode=mode,
+        response_validation_error_callback=response_validation_error_callback,
+    )
+    test_app.config["TESTING"] = True
+
+    @test_app.post("/test", responses={201: BadResponse, 200: GoodResponse})
+    def endpoint_test(body: BaseRequest):
+        return body.model_dump(), body.test_int
+
+    with test_app.test_client() as client:
+        resp = client.post("/test", json={"test_int": 201, "test_str": "s"})
+        assert resp.status_code == 201
+        assert resp.json == {"test_int": 201, "test_str": "s"}
+        resp.close()
+        resp = client.post("/test", json={"test_int": 200, "test_str": "s"})
+        assert resp.status_code == 200
+        resp.close()
+
+    assert errors == [(("test_int",), "endpoint_test")]
+
+
+def test_validate_response_in_background(request, caplog):
+    """
+    Violations found once the response has been sent are reported within the app context,
+    and errors of the callback are logged
+    """
+    errors = []
+
+    def response_validation_error_callback(e, endpoint):
+        errors.append((current_app.name, endpoint))
+        raise RuntimeError("report failed")
+
+    test_app = OpenAPI(
+        request.node.name,
+        validate_response=True,
+        validate_response_mode="background",
+        response_validation_error_callback=response_validation_error_callback,
+    )
+    test_app.config["TESTING"] = True
+
+    @test_app.post("/test", responses={201: BadResponse})
+    def endpoint_test(body: BaseRequest):
+        return body.model_dump(), 201
+
+    with caplog.at_level(logging.ERROR, logger="flask_openapi3"):
+        with test_app.test_client() as client:
+            resp = client.post("/test", json={"test_int": 201, "test_str": "s"})
+            assert resp.status_code == 201
+            resp.close()
+
+    assert errors == [(request.node.name, "endpoint_test")]
+    assert caplog.records[0].exc_info[1].args == ("report failed",)
+
+
+def test_invalid_validate_response_mode(request):
+    with pytest.raises(ValueError):
+        OpenAPI(request.node.name, validate_response_mode="ignore")
+
+
+def test_validated_model_is_encoded(request):
+    """
+    The validated model is what gets encoded, not the returned dict
+    """
+    test_app = OpenAPI(request.node.name, validate_response=True)
+    test_app.config["TESTING"] = True
+
+    @test_app.post("/test", responses={201: GoodResponse})
+    def endpoint_test(body: BaseRequest):
+        return {"test_int": "1", "test_str": "s", "extra": True}, 201, {"X-Test": "1"}
+
+    with test_app.test_client() as client:
+        resp = client.post("/test", json={"test_int": 1, "test_str": "s"})
+        assert resp.status_code == 201
+        assert resp.headers["X-Test"] == "1"
+        assert resp.data == b'{"test_int":1,"test_str":"s"}'
+
+
+def test_encoded_response_is_not_decoded(request, monkeypatch):
+    """
+    A response that is already encoded is validated from its body
+    """
+    test_app = OpenAPI(request.node.name, validate_response=True)
+    test_app.config["TESTING"] = True
+    validated = []
+
+    class CountedResponse(GoodResponse):
+        @classmethod
+        def model_validate(cls, *args, **kwargs):
+            validated.append(args)  # pragma: no cover
+            return super().model_validate(*args, **kwargs)  # pragma: no cover
+
+    @test_app.post("/test", responses={200: CountedResponse, 201: CountedResponse})
+    def endpoint_test(body: BaseRequest):
+        if body.test_int == 200:
+            return test_app.json.response(body.model_dump())
+        if body.test_int == 0:
+            return test_app.json.response({"test_int": "a", "test_str": body.test_str})
+        return CountedResponse(test_int=body.test_int, test_str=body.test_str), 201
+
+    def get_json(*args, **kwargs):
+        raise AssertionError("the response should not be decoded")  # pragma: no cover
+
+    with test_app.test_client() as client:
+        monkeypatch.setattr("flask.wrappers.Response.get_json", get_json)
+        assert client.post("/test", json={"test_int": 200, "test_str": "s"}).status_code == 200
+        assert client.post("/test", json={"test_int": 201, "test_str": "s"}).status_code == 201
+        with pytest.raises(ValidationError):
+            client.post("/test", json={"test_int": 0, "test_str": "s"})
+
+    assert validated == []
+
+
+def test_validate_response_status_lookup(request):
+    """
+    String keys, ranges and the default response are matched to the returned status code
+    """
+    test_app = OpenAPI(request.node.name, validate_response=True)
+    test_app.config["TESTING"] = True
+
+    @test_app.post("/test", responses={"201": BadResponse, "4XX": BadResponse, "default": GoodResponse})
+    def endpoint_test(body: BaseRequest):
+        return body.model_dump(), body.test_int, {"X-Test": "1"}
+
+    @test_app.post("/headers", responses={"200": BadResponse})
+    def endpoint_headers(body: BaseRequest):
+        return body.model_dump(), {"X-Test": "1"}
+
+    with test_app.test_client() as client:
+        resp = client.post("/test", json={"test_int": 500, "test_str": "s"})
+        assert resp.status_code == 500
+        for status_code in (201, 404):
+            with pytest.raises(ValidationError):
+                client.post("/test", json={"test_int": status_code, "test_str": "s"})
+        with pytest.raises(ValidationError):
+            client.post("/headers", json={"test_int": 1, "test_str": "s"})
+
+
+def test_validate_response_explicit_status_without_model(request):
+    """
+    A status code declared without a model is not validated against a range
+    """
+    test_app = OpenAPI(request.node.name, validate_response=True)
+    test_app.config["TESTING"] = True
+
+    @test_app.delete("/test", responses={204: None, "2XX": BadResponse})
+    def endpoint_test():
+        return "", 204
+
+    with test_app.test_client() as client:
+        assert client.delete("/test").status_code == 204
+
+
+def test_custom_validate_response_callback(request):
+    """
+    A custom validate_response_callback gets the responses of the route
+    """
+    calls = []
+
+    def validate_response_callback(response, responses=None):
+        calls.append(responses)
+        return response
+
+    test_app = OpenAPI(request.node.name, validate_response=True, validate_response_callback=validate_response_callback)
+    test_app.config["TESTING"] = True
+
+    @test_app.post("/test", responses={201: BadResponse})
+    def endpoint_test(body: BaseRequest):
+        return body.model_dump(), 201
+
+    with test_app.test_client() as client:
+        assert client.post("/test", json={"test_int": 1, "test_str": "s"}).status_code == 201
+
+    assert calls == [{201: BadResponse}]
+    assert type(calls[0]) is dict
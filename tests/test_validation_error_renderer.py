@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# @Author  : llc
+# @Time    : 2025/6/30 9:15
+import pytest
+from pydantic import BaseModel, Field, field_validator
+
+from flask_openapi3 import OpenAPI, ValidationErrorModel
+from flask_openapi3.utils import make_validation_error_renderer
+
+
+class BookBody(BaseModel):
+    name: str
+    age: int
+    tags: list[str]
+
+    @field_validator("name")
+    @classmethod
+    def validate_name(cls, value):
+        if value == "invalid":
+            raise ValueError("invalid name")
+        return value
+
+
+class ErrorModel(BaseModel):
+    loc: list[str | int]
+    message: str = Field(..., validation_alias="msg")
+
+
+def create_app(validation_error_model=ValidationErrorModel, **kwargs) -> OpenAPI:
+    app = OpenAPI(
+        __name__,
+        validation_error_model=validation_error_model,
+        validation_error_callback=make_validation_error_renderer(**kwargs),
+    )
+    app.config["TESTING"] = True
+
+    @app.post("/book")
+    def create_book(body: BookBody):
+        return "ok"  # pragma: no cover
+
+    return app
+
+
+def test_renderer():
+    client = create_app().test_client()
+    resp = client.post("/book", json={"name": "invalid", "age": "a", "tags": "b"})
+    assert resp.status_code == 422
+    assert resp.json == [
+        {
+            "type": "value_error",
+            "loc": ["name"],
+            "msg": "Value error, invalid name",
+            "input": "invalid",
+            "ctx": {"error": "invalid name"},
+        },
+        {
+            "type": "int_parsing",
+            "loc": ["age"],
+            "msg": "Input should be a valid integer, unable to parse string as an integer",
+            "input": "a",
+        },
+        {"type": "list_type", "loc": ["tags"], "msg": "Input should be a valid array", "input": "b"},
+    ]
+
+
+@pytest.mark.parametrize("kwargs", [{"max_errors": 1}, {"fail_fast": True}])
+def test_renderer_max_errors(kwargs):
+    client = create_app(**kwargs).test_client()
+    resp = client.post("/book", json={"name": "S", "age": "a", "tags": "b"})
+    assert [error["loc"] for error in resp.json] == [["age"]]
+
+
+def test_renderer_truncates_input():
+    client = create_app(max_input_length=8, include_url=True).test_client()
+    resp = client.post("/book", json={"name": "S", "age": "a" * 100, "tags": ["a"] * 100, "extra": "x"})
+    assert [error["input"] for error in resp.json] == ["aaaaaaaa..."]
+    assert resp.json[0]["url"].startswith("https://errors.pydantic.dev/")
+
+    resp = client.post("/book", json={"age": 1, "tags": [], "extra": "x" * 100})
+    assert resp.json[0]["type"] == "missing"
+    assert resp.json[0]["input"] == '{"age":1...'
+
+    client = create_app(max_input_length=64).test_client()
+    resp = client.post("/book", json={"age": 1, "tags": []})
+    assert resp.json[0]["input"] == {"age": 1, "tags": []}
+
+
+def test_renderer_validation_error_model():
+    client = create_app(ErrorModel, max_errors=2).test_client()
+    resp = client.post("/book", json={"name": "invalid", "age": "a", "tags": "b"})
+    assert resp.status_code == 422
+    assert resp.json == [
+        {"loc": ["name"], "message": "Value error, invalid name"},
+        {"loc": ["age"], "message": "Input should be a valid integer, unable to parse string as an integer"},
+    ]